@@ -5,8 +5,13 @@ from data import show_data_expander  # Importeer de data-expander
 from forecast2 import show_forecast2_expander
 from forecast1 import show_forecast1_expander
 from forecastchart import show_weather_chart_expander
+from sites import show_sites_expander
+from metrics import start_rerun, finish_rerun, show_metrics_expander
 
 def main():
+    # Start de metingen van deze rerun (duur, bytes, cache-hits en fouten per ophaling en expander)
+    start_rerun()
+
     # Verkrijg invoer van de gebruiker
     latitude, longitude, location = show_input_form()
 
@@ -28,9 +33,15 @@ def main():
     show_forecast1_expander()
     #toon de voorspellingen voor -1dag+7 dagen
     show_forecast2_expander()
+    #toon meerdere telposten tegelijk (één aanvraag voor alle locaties)
+    show_sites_expander()
     #toon de Echart
     #show_weather_chart_expander()
     st.write(f"Momenteel zijn we volop bezig om een nieuwere, performantere versie te ontwikkelen - STAY TUNED")
 
+    # Sluit de metingen af en toon ze (enkel met ?debug=1 of WEATHER_APP_DEBUG=1)
+    finish_rerun()
+    show_metrics_expander()
+
 if __name__ == "__main__":
     main()
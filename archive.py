@@ -0,0 +1,175 @@
+#archive.py - lokaal kolomarchief (Parquet) van historische uurdata, per rastercel en per maand, met aanvullen van ontbrekende dagen
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from gridcells import MODEL_GRID_DEGREES, snap
+from hourlyframe import HourlyFrame
+from solar import sun_events
+
+try:
+    import fcntl
+except ImportError:  # Windows: enkel de threadlock binnen één proces
+    fcntl = None
+
+# Locatie van het archief (overleeft een herstart van het proces, net als de HTTP-cache)
+ARCHIVE_DIR = os.getenv("WEATHER_APP_ARCHIVE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".weather_archive"))
+MIN_HOURS_PER_DAY = 23  # een dag telt als aanwezig met minstens zoveel uren (zomertijd-overgang heeft er 23)
+
+_write_lock = threading.Lock()
+
+
+# Sleutel van de roostercel (modelrooster) voor een locatie, bv. "+51.24_+2.98"
+def cell_key(lat, lon):
+    lat, lon = snap(lat, lon, MODEL_GRID_DEGREES)
+    return f"{lat:+.2f}_{lon:+.2f}"
+
+
+# Pad van het maandbestand van een cel, bv. .weather_archive/cell=+51.24_+2.98/month=2024-09.parquet
+def month_path(cell, month):
+    return os.path.join(ARCHIVE_DIR, f"cell={cell}", f"month={month}.parquet")
+
+
+# Alle maanden ("YYYY-MM") die een periode raakt
+def _months(start_date, end_date):
+    months = np.arange(np.datetime64(start_date, "M"), np.datetime64(end_date, "M") + 1)
+    return [str(month) for month in months]
+
+
+# Exclusieve lock op een maandbestand, ook tussen processen (report.py schrijft vanuit een procespool):
+# lezen, samenvoegen en schrijven van dezelfde cel en maand gebeurt zo door één schrijver tegelijk
+@contextmanager
+def _month_lock(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Lees één maandbestand als HourlyFrame (None als het nog niet bestaat)
+def read_month(cell, month):
+    path = month_path(cell, month)
+    if not os.path.exists(path):
+        return None
+    table = pq.read_table(path)
+    metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()}
+    return HourlyFrame(
+        table.column("time").to_numpy(),
+        {name: table.column(name).to_numpy() for name in table.column_names if name != "time"},
+        timezone=metadata.get("timezone"),
+        utc_offset_seconds=int(metadata.get("utc_offset_seconds", 0)),
+        latitude=float(metadata["latitude"]) if "latitude" in metadata else None,
+        longitude=float(metadata["longitude"]) if "longitude" in metadata else None,
+    )
+
+
+# Schrijf één maandbestand (eerst naar een tijdelijk bestand, zodat lezers nooit een half bestand zien)
+def _write_month(cell, month, frame):
+    path = month_path(cell, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    columns = {"time": pa.array(frame.time.astype(np.int64), type=pa.int64()).cast(pa.timestamp("s"))}
+    columns.update({name: pa.array(values) for name, values in frame.columns.items()})
+    metadata = {
+        "timezone": frame.timezone or "",
+        "utc_offset_seconds": str(frame.utc_offset_seconds),
+        "latitude": str(frame.latitude),
+        "longitude": str(frame.longitude),
+    }
+    table = pa.table(columns).replace_schema_metadata(metadata)
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(table, temporary_path, compression="zstd")
+    os.replace(temporary_path, path)
+
+
+# Voeg opgehaalde uren toe aan het archief; enkel volledig verstreken dagen (vóór vandaag) worden bewaard,
+# en uren zonder enige waarde (nog niet gepubliceerd) niet, zodat die later opnieuw opgehaald worden
+def store(lat, lon, frame):
+    if frame is None or not len(frame):
+        return
+    cell = cell_key(lat, lon)
+    local_days = frame.local_time.astype("datetime64[D]")
+    has_values = np.zeros(len(frame), dtype=bool)
+    for values in frame.columns.values():
+        has_values |= ~np.isnan(values)
+    past = frame.take((local_days < np.datetime64(date.today())) & has_values)
+    if not len(past):
+        return
+    local_months = past.local_time.astype("datetime64[M]")
+    with _write_lock:
+        for month in np.unique(local_months):
+            new_rows = past.take(local_months == month)
+            with _month_lock(month_path(cell, str(month))):
+                merged = HourlyFrame.concat([read_month(cell, str(month)), new_rows])
+                _write_month(cell, str(month), merged)
+
+
+# Dagen uit [start_date, end_date] die (voor alle gevraagde variabelen) nog niet in het archief zitten,
+# gegroepeerd tot aaneengesloten reeksen (start, einde) zodat er zo weinig mogelijk aanvragen nodig zijn
+def missing_ranges(frame, start_date, end_date, variables):
+    days = np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + 1)
+    if frame is not None and all(name in frame for name in variables):
+        stored_days, counts = np.unique(frame.local_time.astype("datetime64[D]"), return_counts=True)
+        missing = ~np.isin(days, stored_days[counts >= MIN_HOURS_PER_DAY])
+    else:
+        missing = np.ones(len(days), dtype=bool)
+
+    ranges = []
+    for day, is_missing in zip(days, missing):
+        day = day.item()
+        if not is_missing:
+            continue
+        if ranges and ranges[-1][1] == day - timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+# Zonsopgang en -ondergang per dag (unix-seconden), lokaal berekend; vervangt het daily-blok van de API
+def _daily_sun(frame):
+    days = np.unique(frame.local_time.astype("datetime64[D]"))
+    events = sun_events(days, frame.latitude, frame.longitude, events=("sunrise", "sunset"))
+    return {
+        "time": days.astype("datetime64[s]").astype(np.int64),
+        "sunrise": events["sunrise"].astype(np.int64),
+        "sunset": events["sunset"].astype(np.int64),
+    }
+
+
+def load_range(lat, lon, start_date, end_date, fetch, variables=()):
+    """
+    Geef de uurdata voor [start_date, end_date] (lokale dagen) terug als één HourlyFrame.
+    Eerst wordt het archief gelezen; enkel ontbrekende dagen worden met fetch(lat, lon, start, einde) opgehaald
+    en daarna in het archief bijgeschreven. Geeft None terug als er geen gegevens zijn.
+    """
+    cell = cell_key(lat, lon)
+    archived = HourlyFrame.concat([read_month(cell, month) for month in _months(start_date, end_date)])
+    variables = variables or (archived.variables if archived is not None else ())
+
+    fetched = []
+    for missing_start, missing_end in missing_ranges(archived, start_date, end_date, variables):
+        frame = fetch(lat, lon, missing_start, missing_end)
+        if frame is not None:
+            store(lat, lon, frame)
+            fetched.append(frame)
+
+    frame = HourlyFrame.concat([archived, *fetched])
+    if frame is None:
+        return None
+    local_days = frame.local_time.astype("datetime64[D]")
+    frame = frame.take((local_days >= np.datetime64(start_date, "D")) & (local_days <= np.datetime64(end_date, "D")))
+    if not len(frame):
+        return None
+    frame.daily = _daily_sun(frame)
+    return frame
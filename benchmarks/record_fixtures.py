@@ -0,0 +1,45 @@
+#benchmarks/record_fixtures.py - neemt de antwoorden van de echte API's op voor het vaste scenario (netwerk nodig),
+#of met --standin van de lokale stand-in server (zonder netwerk, vaste synthetische gegevens)
+#Gebruik (vanuit de hoofdmap): python -m benchmarks.record_fixtures [--standin]
+import argparse
+import shutil
+import sys
+
+from benchmarks.scenario import app_script, prepare_environment, run_scenario
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Neem de fixtures van het benchmarkscenario op.")
+    parser.add_argument("--standin", action="store_true", help="opnemen van de lokale stand-in server (geen netwerk)")
+    args = parser.parse_args(argv)
+
+    workdir = prepare_environment()
+    from streamlit.testing.v1 import AppTest
+
+    from benchmarks.replay import RecordingAdapter, StandinRecordingAdapter, mount
+    from http_client import POOL_CONNECTIONS, POOL_MAXSIZE, get_session
+
+    server = None
+    if args.standin:
+        from standin_server import serve
+
+        server = serve(port=0, background=True)
+        standin_url = f"http://127.0.0.1:{server.server_address[1]}"
+        adapter = StandinRecordingAdapter(standin_url, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    else:
+        adapter = RecordingAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    mount(get_session(), adapter)
+    at = run_scenario(AppTest.from_function(app_script, default_timeout=120))
+    shutil.rmtree(workdir, ignore_errors=True)
+    if server:
+        server.shutdown()
+
+    if at.exception:
+        print("Fout tijdens het opnemen:", [exception.value for exception in at.exception])
+        return 1
+    print(f"Fixtures opgeslagen in {adapter.fixtures_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#benchmarks/replay.py - opgenomen HTTP-antwoorden (fixtures) opslaan en afspelen via een requests-adapter
+import hashlib
+import io
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+import urllib3
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# Canonieke vorm van een URL (queryparameters gesorteerd), zodat dezelfde aanvraag altijd dezelfde fixture vindt
+def canonical_url(url):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}?{query}"
+
+
+# Pad van een fixture: fixtures/<host>/<sha1 van methode + canonieke URL>
+def fixture_path(method, url, fixtures_dir=FIXTURES_DIR):
+    key = hashlib.sha1(f"{method} {canonical_url(url)}".encode()).hexdigest()
+    return os.path.join(fixtures_dir, urlsplit(url).hostname or "local", key)
+
+
+# Bewaar één antwoord als <pad>.json (status, headers, URL) en <pad>.body (ruwe bytes)
+def save_fixture(method, response, fixtures_dir=FIXTURES_DIR):
+    path = fixture_path(method, response.url, fixtures_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.body", "wb") as handle:
+        handle.write(response.content)
+    with open(f"{path}.json", "w", encoding="utf-8") as handle:
+        json.dump({
+            "url": canonical_url(response.url),
+            "status": response.status_code,
+            "headers": {key: value for key, value in response.headers.items() if key.lower() == "content-type"},
+        }, handle, indent=1)
+
+
+# Lees een fixture terug als requests.Response (None als er geen is)
+def load_fixture(request, fixtures_dir=FIXTURES_DIR):
+    path = fixture_path(request.method, request.url, fixtures_dir)
+    if not os.path.exists(f"{path}.json"):
+        return None
+    with open(f"{path}.json", encoding="utf-8") as handle:
+        meta = json.load(handle)
+    with open(f"{path}.body", "rb") as handle:
+        body = handle.read()
+
+    response = requests.Response()
+    response.status_code = meta["status"]
+    response.headers.update(meta["headers"])
+    response._content = body
+    # requests-cache bewaart ook het onderliggende urllib3-antwoord
+    response.raw = urllib3.HTTPResponse(
+        body=io.BytesIO(body), status=meta["status"], headers=meta["headers"], preload_content=False,
+        request_url=request.url,
+    )
+    response.url = request.url
+    response.request = request
+    response.reason = "OK" if meta["status"] < 400 else "Replayed error"
+    response.encoding = "utf-8"
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Beantwoordt elke aanvraag uit de fixtures; een ontbrekende fixture geeft een ConnectionError (geen netwerk)."""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        super().__init__()
+        self.fixtures_dir = fixtures_dir
+        self.misses = []
+
+    def send(self, request, **kwargs):
+        response = load_fixture(request, self.fixtures_dir)
+        if response is None:
+            self.misses.append(request.url)
+            raise requests.ConnectionError(f"Geen fixture voor {canonical_url(request.url)}", request=request)
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Gewone adapter die elk geslaagd antwoord ook als fixture bewaart."""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        response.content  # antwoord volledig inlezen voor het bewaren
+        if response.status_code < 500:
+            save_fixture(request.method, response, self.fixtures_dir)
+        return response
+
+
+class StandinRecordingAdapter(RecordingAdapter):
+    """
+    Stuurt de aanvragen naar de lokale stand-in server (standin_server.py) in plaats van naar de publieke API's,
+    maar bewaart de antwoorden onder de publieke URL: zo ontstaat een vaste set fixtures zonder netwerk.
+    """
+
+    def __init__(self, standin_url, fixtures_dir=FIXTURES_DIR, **kwargs):
+        super().__init__(fixtures_dir, **kwargs)
+        self.standin_url = standin_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        from standin_server import PREFIXES
+
+        public_url = request.url
+        for prefix, base in PREFIXES.items():
+            if public_url.startswith(base + "/"):
+                request.url = self.standin_url + prefix + public_url[len(base):]
+                break
+        response = HTTPAdapter.send(self, request, **kwargs)
+        response.content
+        request.url = response.url = public_url
+        if response.status_code < 500:
+            save_fixture(request.method, response, self.fixtures_dir)
+        return response
+
+
+# Koppel een adapter aan de gedeelde sessie van de app (alle API's lopen via http_client.get_session)
+def mount(session, adapter):
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return adapter
@@ -0,0 +1,223 @@
+#benchmarks/run_benchmarks.py - meet omrekeningen, opmaak, ophalen/decoderen en volledige reruns op opgenomen fixtures
+#Gebruik (vanuit de hoofdmap): python -m benchmarks.run_benchmarks [--quick] [--no-save] [--compare BESTAND]
+#Elke run wordt bewaard in benchmarks/results/<datum>_<commit>.json en vergeleken met de vorige run.
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.scenario import REPO_DIR, SCENARIO_DATE, app_script, prepare_environment, run_scenario
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+REGRESSION_THRESHOLD = 1.10  # meer dan 10% trager dan de vorige run wordt gemeld
+
+
+# Meet een functie: repeat keer number oproepen; geeft min en mediaan (ms per oproep) terug
+def measure(func, repeat=7, number=1):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) * 1000 / number)
+    return {"min_ms": round(min(timings), 4), "median_ms": round(statistics.median(timings), 4), "repeat": repeat}
+
+
+# Korte commit-hash van de huidige checkout (of "onbekend" buiten git)
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "onbekend"
+
+
+# Omrekeningen: de gevectoriseerde kernen op een volledige matrix en de scalaire varianten per waarde
+def bench_conversions(results, repeat):
+    import numpy as np
+
+    import conversions
+    import data
+    import forecast2
+
+    rng = np.random.default_rng(0)
+    speeds = rng.uniform(0, 120, 40 * 16 * 24).astype(np.float32)  # 40 telposten x 16 dagen x uur
+    directions = rng.uniform(0, 360, speeds.size).astype(np.float32)
+    visibility = rng.uniform(0, 50000, speeds.size).astype(np.float32)
+    sample = [float(value) for value in speeds[:1000]]
+
+    results["conversions.beaufort[15360]"] = measure(lambda: conversions.beaufort(speeds), repeat, 20)
+    results["conversions.compass[15360]"] = measure(lambda: conversions.compass(directions), repeat, 20)
+    results["conversions.visibility_km[15360]"] = measure(lambda: conversions.visibility_km(visibility), repeat, 20)
+    results["data.wind_speed_to_beaufort x1000"] = measure(lambda: [data.wind_speed_to_beaufort(v) for v in sample], repeat)
+    results["data.get_wind_direction x1000"] = measure(lambda: [data.get_wind_direction(v) for v in sample], repeat)
+    results["forecast2.wind_direction_to_compass x1000"] = measure(
+        lambda: [forecast2.wind_direction_to_compass(v) for v in sample], repeat
+    )
+
+
+# Ophalen en decoderen van de opgenomen FlatBuffers-antwoorden, rechtstreeks (zonder HTTP-cache)
+def bench_decode(results, repeat, fixtures_dir):
+    import openmeteo_requests
+    import requests
+
+    import data
+    import forecast2
+    from benchmarks.replay import ReplayAdapter, mount
+    from hourlyframe import HourlyFrame
+    from openmeteo import fetch_weather_arrays
+    from planner import _VIEWS, planned_variables
+
+    session = requests.Session()
+    mount(session, ReplayAdapter(fixtures_dir))
+    client = openmeteo_requests.Client(session=session)
+
+    import openmeteo
+    openmeteo._client, original_client = client, openmeteo._client
+    try:
+        for view, url, extra in (
+            ("forecast2", forecast2.FORECAST_API_URL, {}),
+            ("historical", data.HISTORICAL_API_URL,
+             {"start_date": SCENARIO_DATE.isoformat(), "end_date": SCENARIO_DATE.isoformat()}),
+        ):
+            plan_key = _VIEWS[view][0]
+            hourly, daily = planned_variables(plan_key)
+            params = {"latitude": 51.24, "longitude": 2.98, **dict(plan_key[1]), **extra, "hourly": hourly, "daily": daily}
+            results[f"decode.{view}"] = measure(lambda: HourlyFrame.from_arrays(fetch_weather_arrays(url, dict(params))[0]), repeat)
+    finally:
+        openmeteo._client = original_client
+
+
+# Opmaak: de lussen per rij van de expanders, op frames uit de fixtures
+def bench_render(results, repeat):
+    import numpy as np
+
+    import data
+    import forecast2
+    import scoring
+    from hourlyframe import HourlyFrame
+
+    forecast = forecast2.fetch_forecast_data(51.2389, 2.9724)
+    historical = data.fetch_historical_weather_data(51.2389, 2.9724, SCENARIO_DATE)
+    if forecast is not None:
+        window = forecast.take(forecast.time_of_day_mask("06:00", "20:00"))
+        results["forecast2.render_forecast_table"] = measure(lambda: forecast2.render_forecast_table(window), repeat, 5)
+        chart_window = forecast.select("temperature_2m", "precipitation").between()
+        results["forecastchart.series"] = measure(
+            lambda: (chart_window.hour_labels().tolist(), chart_window["temperature_2m"].tolist()), repeat, 20
+        )
+        # 40 telposten met dezelfde tijdas (zoals na een batch-aanvraag)
+        frames = [HourlyFrame(forecast.time, dict(forecast.columns), forecast.timezone) for _ in range(40)]
+        latitudes, longitudes = np.linspace(51.0, 53.5, 40), np.linspace(2.5, 5.0, 40)
+        results["scoring.best_windows[40 sites]"] = measure(
+            lambda: scoring.best_windows(frames, latitudes, longitudes), repeat
+        )
+    # Kaarten: opbouw van de folium-kaart tegenover de gecachete HTML
+    import maps
+    map_args = ((51.2389, 2.9724), 9, (maps.OSM_LAYER,), ((51.2389, 2.9724, "Bredene"),))
+    results["maps.build_map"] = measure(lambda: maps.build_map(*map_args).get_root().render(), repeat, 5)
+    results["maps.map_html (cached)"] = measure(lambda: maps.map_html(*map_args), repeat, 20)
+    if historical is not None:
+        window = historical.take(historical.time_of_day_mask("06:00", "20:00"))
+        results["data.format_weather_lines"] = measure(lambda: data.format_weather_lines(window), repeat, 20)
+
+
+# Volledige reruns via AppTest: koud (lege caches) en warm (zelfde invoer opnieuw)
+def bench_app(results, repeat, workdir):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from http_client import get_session
+
+    def cold_run():
+        get_session().cache.clear()
+        st.cache_data.clear()
+        shutil.rmtree(os.environ["WEATHER_APP_ARCHIVE"], ignore_errors=True)
+        run_scenario(AppTest.from_function(app_script, default_timeout=120))
+
+    results["app.scenario (cold caches)"] = measure(cold_run, max(1, repeat // 2))
+
+    at = run_scenario(AppTest.from_function(app_script, default_timeout=120))
+    if at.exception:
+        raise RuntimeError(f"Fout in de app: {[exception.value for exception in at.exception]}")
+    results["app.rerun (warm caches)"] = measure(at.run, repeat)
+
+
+# Vergelijk met een eerdere run en meld vertragingen boven de drempel
+def compare(results, previous_path):
+    with open(previous_path, encoding="utf-8") as handle:
+        previous = json.load(handle)
+    print(f"\nVergelijking met {os.path.basename(previous_path)} (commit {previous.get('commit')}):")
+    regressions = 0
+    for name, current in results.items():
+        before = previous["results"].get(name)
+        if not before:
+            print(f"  {name:45s} nieuw")
+            continue
+        ratio = current["min_ms"] / before["min_ms"] if before["min_ms"] else float("inf")
+        flag = "  <-- trager" if ratio > REGRESSION_THRESHOLD else ""
+        regressions += bool(flag)
+        print(f"  {name:45s} {before['min_ms']:10.3f} -> {current['min_ms']:10.3f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks van de Weather App op opgenomen fixtures.")
+    parser.add_argument("--quick", action="store_true", help="minder herhalingen")
+    parser.add_argument("--no-save", action="store_true", help="resultaat niet bewaren")
+    parser.add_argument("--compare", help="vergelijk met dit resultaatbestand (standaard: de vorige run)")
+    parser.add_argument("--fixtures", help="map met fixtures (standaard: benchmarks/fixtures)")
+    args = parser.parse_args(argv)
+    repeat = 3 if args.quick else 7
+
+    workdir = prepare_environment()
+    from benchmarks.replay import FIXTURES_DIR, ReplayAdapter, mount
+    from http_client import get_session
+
+    fixtures_dir = args.fixtures or FIXTURES_DIR
+    if not glob.glob(os.path.join(fixtures_dir, "*", "*.json")):
+        print(f"Geen fixtures in {fixtures_dir}; neem ze eerst op met: python -m benchmarks.record_fixtures [--standin]")
+        return 1
+    replay = mount(get_session(), ReplayAdapter(fixtures_dir))
+
+    results = {}
+    try:
+        bench_conversions(results, repeat)
+        bench_decode(results, repeat, fixtures_dir)
+        bench_render(results, repeat)
+        bench_app(results, repeat, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, timing in results.items():
+        print(f"{name:45s} min {timing['min_ms']:10.3f} ms   mediaan {timing['median_ms']:10.3f} ms")
+    if replay.misses:
+        print(f"\nLet op: {len(replay.misses)} aanvragen zonder fixture, bv. {replay.misses[0]}")
+
+    previous = args.compare or (sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json"))) or [None])[-1]
+    regressions = compare(results, previous) if previous else 0
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        commit = current_commit()
+        path = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({
+                "commit": commit,
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpu)",
+                "results": results,
+            }, handle, indent=1)
+        print(f"\nResultaat bewaard in {path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
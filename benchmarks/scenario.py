@@ -0,0 +1,64 @@
+#benchmarks/scenario.py - vast scenario (locatie, datum) dat zowel opgenomen als afgespeeld wordt
+import os
+import sys
+import tempfile
+from datetime import date, datetime, time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Vaste invoer, zodat de aanvragen (en dus de fixtures) altijd dezelfde zijn
+SCENARIO_LOCATION = "Bredene"
+SCENARIO_DATE = date(2024, 9, 15)  # volop najaarstrek
+SCENARIO_SITES = (
+    "Bredene; 51.2389; 2.9724\n"
+    "Oostende; 51.2150; 2.9270\n"
+    "De Haan; 51.2727; 3.0360\n"
+    "Zeebrugge; 51.3330; 3.2070\n"
+    "Nieuwpoort; 51.1300; 2.7510"
+)
+
+
+# Klok die altijd op de scenariodatum staat (de app gebruikt datetime.now() als standaarddatum)
+class ScenarioDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls.combine(SCENARIO_DATE, time(12), tzinfo=tz)
+
+
+# Zet de omgeving klaar vóór de app-modules geïmporteerd worden: eigen (lege) HTTP-cache en archief,
+# en de repository op sys.path. Geeft de tijdelijke map terug.
+def prepare_environment():
+    workdir = tempfile.mkdtemp(prefix="weather-bench-")
+    os.environ["WEATHER_APP_CACHE"] = os.path.join(workdir, "http_cache")
+    os.environ["WEATHER_APP_ARCHIVE"] = os.path.join(workdir, "archive")
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    return workdir
+
+
+# Het script dat AppTest uitvoert: de volledige app, plus de grafiek-expander die in app.py (nog) uitgeschakeld is
+def app_script():
+    import invoer
+    from benchmarks.scenario import ScenarioDatetime
+
+    invoer.datetime = ScenarioDatetime
+    exec(open("app.py", encoding="utf-8").read(), {"__name__": "__main__"})
+
+    from forecastchart import show_weather_chart_expander
+    show_weather_chart_expander()
+
+
+# Uitklapvakken die het scenario opent (gesloten vakken halen niets op, zie lazy.py)
+SCENARIO_SECTIONS = ("data", "map", "forecast1", "forecast2", "sites", "chart")
+
+
+# Speel het scenario af in een AppTest: alle uitklapvakken open, eerste run, daarna de telposten invullen (batch-aanvraag)
+def run_scenario(at):
+    from lazy import section_key
+
+    for name in SCENARIO_SECTIONS:
+        at.session_state[section_key(name)] = True
+    at.run()
+    at.text_area[0].set_value(SCENARIO_SITES).run()
+    return at
@@ -0,0 +1,42 @@
+#build_gazetteer.py - maakt gazetteer.tsv.gz uit een GeoNames-dump (bv. cities1000.txt van download.geonames.org)
+#Gebruik: python build_gazetteer.py cities1000.txt [--output gazetteer.tsv.gz] [--min-population 1000]
+import argparse
+import csv
+import gzip
+import sys
+
+from gazetteer import COUNTRY_CODES, GAZETTEER_PATH
+
+# Kolommen van het GeoNames-formaat (tab-gescheiden, zonder hoofding)
+NAME, LATITUDE, LONGITUDE, FEATURE_CLASS, COUNTRY_CODE, POPULATION = 1, 4, 5, 6, 8, 14
+
+
+# Lees de bevolkte plaatsen (feature class P) van de ondersteunde landen uit een GeoNames-bestand
+def read_geonames(path, min_population=0):
+    codes = set(COUNTRY_CODES.values())
+    with open(path, encoding="utf-8", newline="") as handle:
+        for row in csv.reader(handle, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if row[FEATURE_CLASS] != "P" or row[COUNTRY_CODE] not in codes:
+                continue
+            population = int(row[POPULATION] or 0)
+            if population < min_population:
+                continue
+            yield row[NAME], row[COUNTRY_CODE], f"{float(row[LATITUDE]):.5f}", f"{float(row[LONGITUDE]):.5f}", population
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maak de offline plaatsnamenlijst uit een GeoNames-dump.")
+    parser.add_argument("geonames", help="GeoNames-bestand, bv. cities1000.txt")
+    parser.add_argument("--output", default=GAZETTEER_PATH)
+    parser.add_argument("--min-population", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rows = sorted(read_geonames(args.geonames, args.min_population), key=lambda row: (row[1], row[0]))
+    with gzip.open(args.output, "wt", encoding="utf-8", compresslevel=9) as handle:
+        for row in rows:
+            handle.write("\t".join(str(value) for value in row) + "\n")
+    print(f"{len(rows)} plaatsen geschreven naar {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#conversions.py - gevectoriseerde omrekeningen (Beaufort, kompasrichting, zichtbaarheid) voor volledige arrays
+import numpy as np
+
+# Bovengrenzen (km/u, inclusief) van Beaufort 0 t.e.m. 11; alles daarboven is 12 (orkaan)
+BEAUFORT_UPPER_KMH = np.array([1, 5, 11, 19, 28, 38, 49, 61, 74, 88, 102, 117], dtype=np.float64)
+
+# 16 kompasrichtingen per taal, telkens beginnend bij het noorden (sectoren van 22.5°)
+COMPASS_POINTS = {
+    "Nederlands": np.array([
+        "N", "NNO", "NO", "ONO", "O", "OZO", "ZO", "ZZO", "Z", "ZZW", "ZW", "WZW", "W", "WNW", "NW", "NNW"
+    ]),
+    "English": np.array([
+        "N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"
+    ]),
+}
+
+MISSING = -1  # waarde voor ontbrekende metingen (NaN) in integer-resultaten
+MISSING_LABEL = "N/B"
+
+
+# Windsnelheid (km/u) naar Beaufort voor een volledige array; ontbrekende waarden worden MISSING
+def beaufort(speed_kmh):
+    speed = np.asarray(speed_kmh, dtype=np.float64)
+    result = np.searchsorted(BEAUFORT_UPPER_KMH, speed, side="left")
+    return np.where(np.isnan(speed), MISSING, result)
+
+
+# Windrichting (graden) naar sectorindex 0-15, waarbij elke sector gecentreerd ligt rond zijn richting
+def compass_index(degrees):
+    degrees = np.asarray(degrees, dtype=np.float64)
+    missing = np.isnan(degrees)
+    index = np.floor(np.where(missing, 0, degrees) / 22.5 + 0.5).astype(np.int64) % 16
+    return np.where(missing, MISSING, index)
+
+
+# Windrichting (graden) naar kompaslabels in de gekozen taal
+def compass(degrees, language="Nederlands"):
+    points = COMPASS_POINTS.get(language, COMPASS_POINTS["Nederlands"])
+    index = compass_index(degrees)
+    return np.where(index == MISSING, MISSING_LABEL, points[np.maximum(index, 0)])
+
+
+# Zichtbaarheid (meter) naar kilometer, afgerond op 0.5 km
+def visibility_km(visibility_meters):
+    return np.round(np.asarray(visibility_meters, dtype=np.float64) / 500) / 2
+
+
+# Scalaire varianten voor bestaande oproepen per waarde
+def beaufort_scalar(speed_kmh):
+    if speed_kmh is None:
+        return MISSING
+    return int(beaufort(speed_kmh))
+
+
+def compass_scalar(degrees, language="Nederlands"):
+    if degrees is None:
+        return MISSING_LABEL
+    return str(compass(degrees, language))
+
+
+def visibility_km_scalar(visibility_meters):
+    return float(visibility_km(visibility_meters))
@@ -1,72 +1,171 @@
-import requests
 import streamlit as st
-from datetime import datetime
+from concurrent.futures import as_completed
+from datetime import date as date_type, timedelta
+import numpy as np
+from prefetch import register_fetcher, get_prefetched, submit
+from archive import load_range
+from endpoints import HISTORICAL_API_URL
+from solar import ZENITHS, local_sun_events, noon_elevation
+from openmeteo import OpenMeteoRequestsError, to_local_datetime
+from planner import register_view, fetch_view, fetch_view_batch
+from metrics import instrument, is_missing
+from lazy import LAZY_PLACEHOLDER, lazy_expander
+from conversions import beaufort, beaufort_scalar, compass, compass_scalar, visibility_km, visibility_km_scalar
 
-# Functie om historische weergegevens op te halen via Open-Meteo API
+HISTORICAL_HOURLY_VARIABLES = [
+    "temperature_2m", "precipitation", "cloud_cover", "cloud_cover_low",
+    "cloud_cover_mid", "cloud_cover_high", "visibility", "wind_speed_10m", "wind_direction_10m"
+]
+
+register_view(
+    "historical", HISTORICAL_API_URL, hourly=HISTORICAL_HOURLY_VARIABLES, daily=["sunrise", "sunset"],
+    timezone="Europe/Berlin"
+)
+
+# Functie om historische weergegevens op te halen (eerst uit het lokale archief, ontbrekende dagen via Open-Meteo);
+# draait in een worker-thread, dus fouten worden door get_prefetched getoond
+@register_fetcher("historical", section="data", errors=OpenMeteoRequestsError,
+                  message="Fout bij het ophalen van weergegevens")
+@instrument("fetch", failed=is_missing)
 def fetch_historical_weather_data(lat, lon, date):
-    api_url = (
-        f"https://historical-forecast-api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}"
-        f"&start_date={date.strftime('%Y-%m-%d')}&end_date={date.strftime('%Y-%m-%d')}"
-        "&hourly=temperature_2m,precipitation,cloud_cover,cloud_cover_low,"
-        "cloud_cover_mid,cloud_cover_high,visibility,wind_speed_10m,wind_direction_10m"
-        "&daily=sunrise,sunset&timezone=Europe%2FBerlin"
-    )
+    return fetch_historical_chunk(lat, lon, date, date)
+
+# Functie om historische weergegevens voor meerdere locaties (lijst van (lat, lon)) in één aanvraag op te halen
+@instrument("fetch", failed=is_missing)
+def fetch_historical_sites(sites, date):
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        data = response.json()
-        return data
-    except requests.RequestException as e:
+        return fetch_view_batch(
+            "historical", sites,
+            start_date=date.strftime('%Y-%m-%d'), end_date=date.strftime('%Y-%m-%d')
+        )
+    except OpenMeteoRequestsError as e:
         st.error(f"Fout bij het ophalen van weergegevens: {e}")
         return None
 
-# Functie om windrichting te converteren van graden naar windrichtingen
-def get_wind_direction(degrees, language="Nederlands"):
-    directions_dutch = [
-        ("N", 0), ("NNO", 22.5), ("NO", 45), ("ONO", 67.5),
-        ("O", 90), ("OZO", 112.5), ("ZO", 135), ("ZZO", 157.5),
-        ("Z", 180), ("ZZW", 202.5), ("ZW", 225), ("WZW", 247.5),
-        ("W", 270), ("WNW", 292.5), ("NW", 315), ("NNW", 337.5)
+# Maximale lengte van één aanvraag in periodemodus; delen vallen samen met kalendermaanden,
+# zodat overlappende periodes dezelfde (gecachete) aanvragen hergebruiken
+HISTORICAL_CHUNK_MONTHS = 1
+
+# Functie om een periode op te splitsen in delen per kalendermaand: lijst van (start, einde)
+def split_date_range(start_date, end_date, months=HISTORICAL_CHUNK_MONTHS):
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        month = chunk_start.month - 1 + months
+        next_start = date_type(chunk_start.year + month // 12, month % 12 + 1, 1)
+        chunk_end = min(next_start - timedelta(days=1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = next_start
+    return chunks
+
+# Functie om aaneengesloten dagen rechtstreeks bij Open-Meteo op te halen (binair, als HourlyFrame)
+def fetch_historical_days(lat, lon, start_date, end_date):
+    return fetch_view(
+        "historical", lat, lon,
+        start_date=start_date.strftime('%Y-%m-%d'), end_date=end_date.strftime('%Y-%m-%d')
+    )
+
+# Functie om één deel van een periode op te halen: het archief wordt eerst gelezen en enkel ontbrekende dagen
+# worden opgehaald en bijgeschreven (fouten worden door de oproeper getoond)
+def fetch_historical_chunk(lat, lon, start_date, end_date):
+    return load_range(lat, lon, start_date, end_date, fetch_historical_days, variables=HISTORICAL_HOURLY_VARIABLES)
+
+# Functie om een periode gelijktijdig in delen op te halen; geeft (index, deel, frame of fout) terug
+# in de volgorde waarin de delen binnenkomen
+def fetch_historical_range(lat, lon, start_date, end_date):
+    chunks = split_date_range(start_date, end_date)
+    futures = {
+        submit(fetch_historical_chunk, lat, lon, chunk_start, chunk_end): (index, (chunk_start, chunk_end))
+        for index, (chunk_start, chunk_end) in enumerate(chunks)
+    }
+    for future in as_completed(futures):
+        index, chunk = futures[future]
+        try:
+            yield index, chunk, future.result()
+        except OpenMeteoRequestsError as e:
+            yield index, chunk, e
+
+# Functie om per dag het venster van civiele schemering te bepalen, afgerond op hele uren zoals in het invoerformulier;
+# zonder begin of einde (NaT) telt bij witte nachten (zon blijft boven -6°) de hele dag, 00:00-24:00,
+# en blijft het venster bij poolnacht (zon komt nooit boven -6°) leeg
+def twilight_windows(frame):
+    days = np.unique(frame.local_time.astype("datetime64[D]"))
+    events = local_sun_events(days, frame.latitude, frame.longitude, frame.timezone)
+    white_night = noon_elevation(days, frame.latitude, frame.longitude) > 90.0 - ZENITHS["civil_twilight"]
+    begins, ends = events["civil_twilight_begin"], events["civil_twilight_end"]
+    begins = np.where(np.isnat(begins) & white_night, days.astype("datetime64[s]"), begins)
+    ends = np.where(np.isnat(ends) & white_night, (days + 1).astype("datetime64[s]") - np.timedelta64(1, "h"), ends)
+    return days, begins.astype("datetime64[h]"), ends.astype("datetime64[h]") + np.timedelta64(1, "h")
+
+# Functie om de weergegevens van een tijdvenster op te maken als tekstregels (één per uur)
+def format_weather_lines(window, language="Nederlands"):
+    hours = window.hour_labels()
+    temperatures = window["temperature_2m"]
+    precipitation = window["precipitation"]
+    cloudcover = window["cloud_cover"]
+    cloudcover_low = window["cloud_cover_low"]
+    cloudcover_mid = window["cloud_cover_mid"]
+    cloudcover_high = window["cloud_cover_high"]
+    # Omrekeningen in één keer voor alle uren (windrichting, Beaufort, zichtbaarheid in km)
+    wind_directions = compass(window["wind_direction_10m"], language)
+    beauforts = beaufort(window["wind_speed_10m"])
+    visibilities_km = visibility_km(window["visibility"])
+
+    return [
+        f"🕒:{hour}|🌡️:{temperatures[i]:.1f}°C|🌧️:{precipitation[i]:.1f} mm|"
+        f"☁️:{cloudcover[i]:.0f}%(☁️L:{cloudcover_low[i]:.0f}%,☁️M:{cloudcover_mid[i]:.0f}%,☁️H:{cloudcover_high[i]:.0f}%)|"
+        f"🧭:{wind_directions[i]} 💨:{beauforts[i]}Bf|👁️:{visibilities_km[i]} km"
+        for i, hour in enumerate(hours)
     ]
-    
-    for direction, angle in directions_dutch:
-        if degrees < angle:
-            return direction
-    return directions_dutch[0][0]  # Default if no match, return the first direction
 
-# Functie om windsnelheid om te zetten naar de Beaufort-schaal
+# Functie om een periode-frame op te maken: per dag een datumregel gevolgd door de uren binnen de schemering;
+# een dag zonder uren in het venster (poolnacht, ontbrekende gegevens) krijgt een melding in plaats van te verdwijnen
+def format_range_lines(frame, language="Nederlands"):
+    days, starts, ends = twilight_windows(frame)
+    if not len(days):
+        return []
+    window = frame.take(frame.daily_window_mask(days, starts, ends))
+    lines = format_weather_lines(window, language)
+    # Grenzen van elke dag in het (chronologische) venster
+    bounds = np.searchsorted(window.local_time.astype("datetime64[D]"), np.append(days, days[-1] + 1))
+    block = []
+    for i, day in enumerate(days):
+        block.append(f"📅 {day}")
+        if bounds[i] < bounds[i + 1]:
+            block.extend(lines[bounds[i]:bounds[i + 1]])
+        elif np.isnat(starts[i]):
+            block.append("🌑 Geen civiele schemering (poolnacht) / No civil twilight (polar night)")
+        else:
+            block.append("⚠️ Geen uren binnen de schemering / No hours within twilight")
+    return block
+
+# Functie om een periode te tonen: elk deel krijgt vooraf een eigen plaats (chronologisch) en wordt ingevuld zodra het binnenkomt
+def show_range_data(lat, lon, start_date, end_date, language):
+    chunks = split_date_range(start_date, end_date)
+    placeholders = [st.empty() for _ in chunks]
+    progress = st.progress(0.0, text=f"0/{len(chunks)}")
+    for done, (index, (chunk_start, chunk_end), result) in enumerate(fetch_historical_range(lat, lon, start_date, end_date), 1):
+        if isinstance(result, Exception):
+            placeholders[index].error(f"Fout bij het ophalen van weergegevens ({chunk_start} - {chunk_end}): {result}")
+        else:
+            placeholders[index].code("\n".join(format_range_lines(result, language)) or f"{chunk_start} - {chunk_end}: geen gegevens")
+        progress.progress(done / len(chunks), text=f"{done}/{len(chunks)}")
+    progress.empty()
+
+# Functie om windrichting te converteren van graden naar windrichtingen (zie conversions.compass)
+def get_wind_direction(degrees, language="Nederlands"):
+    return compass_scalar(degrees, language)
+
+# Functie om windsnelheid om te zetten naar de Beaufort-schaal (zie conversions.beaufort)
 def wind_speed_to_beaufort(speed):
-    if speed < 1:
-        return 0
-    elif speed <= 5:
-        return 1
-    elif speed <= 11:
-        return 2
-    elif speed <= 19:
-        return 3
-    elif speed <= 28:
-        return 4
-    elif speed <= 38:
-        return 5
-    elif speed <= 49:
-        return 6
-    elif speed <= 61:
-        return 7
-    elif speed <= 74:
-        return 8
-    elif speed <= 88:
-        return 9
-    elif speed <= 102:
-        return 10
-    return 11  # Orkaan
+    return beaufort_scalar(speed)
 
 # Functie om de zichtbaarheid om te rekenen naar kilometers en af te ronden op 0.5 km
 def convert_visibility(visibility_meters):
-    visibility_km = visibility_meters / 1000  # Converteer naar kilometers
-    return round(visibility_km * 2) / 2  # Afgerond op 0.5 km
+    return visibility_km_scalar(visibility_meters)
 
 # Functie om de API-gegevens te tonen in een expander in de Streamlit UI
+@instrument("expander")
 def show_data_expander():
     # Haal de taalkeuze op uit de session_state
     language = st.session_state.get("language", "Nederlands")  # Standaard Nederlands
@@ -83,66 +182,56 @@ def show_data_expander():
         st.warning("Ontbrekende locatie- of datumgegevens.")
         return
 
-    # Weerdata ophalen
-    weather_data = fetch_historical_weather_data(lat, lon, date)
-    if not weather_data:
-        return
-
-    # Haal zonsopgang en zonsondergang op, en formatteer naar HH:MM
-    sunrise = datetime.fromisoformat(weather_data["daily"]["sunrise"][0]).strftime("%H:%M")
-    sunset = datetime.fromisoformat(weather_data["daily"]["sunset"][0]).strftime("%H:%M")
+    data_expander_fragment(lat, lon, date, start_hour, end_hour, language)
 
-    # Pas start_hour en end_hour aan op basis van zonsopgang en zonsondergang
-    start_hour = min(sunrise, start_hour)  # Kies de latere tijd tussen zonsopgang en start_hour
-    end_hour = max(sunset, end_hour)  # Kies de vroegere tijd tussen zonsondergang en end_hour
-
-    # Toon weergegevens in een expander
-    with st.expander("**Weatherdata for this location/Weergegevens voor deze locatie**", expanded=False):
+# Inhoud van de data-expander als fragment met expliciete invoer: een keuze binnen de expander
+# (periode, weergavemethode) voert enkel dit deel opnieuw uit, niet de hele pagina
+@st.fragment
+@instrument("fragment")
+def data_expander_fragment(lat, lon, date, start_hour, end_hour, language):
+    # Toon weergegevens in een expander (pas ophalen als de gebruiker ze opent)
+    with lazy_expander("data", "**Weatherdata for this location/Weergegevens voor deze locatie**") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
         st.write("Standaard weergegevens zijn van Civiele zonsopgang tot Civiele zonsondergang !")
         st.write("Default weatherdata is from Civil sunrise untill Civil sunset !")
+        # Keuze tussen één dag (uit het invoerformulier) of een periode (bv. een volledig trekseizoen)
+        mode = st.radio("Periode:", ("Eén dag", "Periode (van - tot)"), horizontal=True)
+
+        if mode == "Periode (van - tot)":
+            today = date_type.today()
+            range_start = st.date_input("Van", value=min(date, today) - timedelta(days=30), max_value=today)
+            range_end = st.date_input("Tot", value=min(date, today), max_value=today)
+            if range_start > range_end:
+                st.warning("De begindatum ligt na de einddatum.")
+                return
+            st.session_state["range_start"] = range_start
+            st.session_state["range_end"] = range_end
+            # Elke dag krijgt zijn eigen venster (civiele schemering), dus de uren uit het formulier gelden hier niet
+            show_range_data(lat, lon, range_start, range_end, language)
+            return
+
+        # Weerdata ophalen (meestal al gestart door de orchestrator in show_input_form)
+        frame = get_prefetched("historical", lat, lon, date)
+        if frame is None:
+            return
+
+        # Haal zonsopgang en zonsondergang op, en formatteer naar HH:MM
+        utc_offset = frame.utc_offset_seconds
+        sunrise = to_local_datetime(frame.daily["sunrise"][0], utc_offset).strftime("%H:%M")
+        sunset = to_local_datetime(frame.daily["sunset"][0], utc_offset).strftime("%H:%M")
+
+        # Pas start_hour en end_hour aan op basis van zonsopgang en zonsondergang
+        start_hour = min(sunrise, start_hour)  # Kies de latere tijd tussen zonsopgang en start_hour
+        end_hour = max(sunset, end_hour)  # Kies de vroegere tijd tussen zonsondergang en end_hour
+
         # Voeg een keuzemenu toe voor weergave-optie
         display_option = st.radio("Kies weergavemethode:", ("Per uur (afzonderlijk)", "Volledig blok (alles in één)"))
-        
-        # Informatie ophalen uit de data
-        hourly_data = weather_data["hourly"]
-        times = hourly_data["time"]
-        temperatures = hourly_data["temperature_2m"]
-        precipitation = hourly_data["precipitation"]
-        cloudcover = hourly_data["cloud_cover"]
-        cloudcover_low = hourly_data["cloud_cover_low"]
-        cloudcover_mid = hourly_data["cloud_cover_mid"]
-        cloudcover_high = hourly_data["cloud_cover_high"]
-        visibility = hourly_data["visibility"]
-        wind_speeds = hourly_data["wind_speed_10m"]
-        wind_directions = hourly_data["wind_direction_10m"]
-        
-        # Lijst voor het verzamelen van de weergegevensregels
-        weather_info_lines = []
-        
-        # Verwerken van weergegevens per uur binnen geselecteerde periode
-        for i, time in enumerate(times):
-            hour = datetime.fromisoformat(time).strftime("%H:%M")
-            if start_hour <= hour <= end_hour:
-                # Zet windrichting om naar de juiste vertaling op basis van de taalkeuze
-                wind_direction = get_wind_direction(wind_directions[i], language)
-                # Zet windsnelheid om naar Beaufort schaal
-                beaufort = wind_speed_to_beaufort(wind_speeds[i])
-                # Zet zichtbaarheid om naar kilometers en afgerond op 0.5 km
-                visibility_km = convert_visibility(visibility[i])
-                
-                # Weergegevens formatten
-                weather_info = (
-                    f"🕒:{hour}|🌡️:{temperatures[i]:.1f}°C|🌧️:{precipitation[i]:.1f} mm|"
-                    f"☁️:{cloudcover[i]}%(☁️L:{cloudcover_low[i]}%,☁️M:{cloudcover_mid[i]}%,☁️H:{cloudcover_high[i]}%)|"
-                    f"🧭:{wind_direction} 💨:{beaufort}Bf|👁️:{visibility_km} km"
-                )
-                    # f"🕒 Tijd", f"🌡️ Temperatuur", f"🌧️ Neerslag", f"☁️ Bewolking", f"👁️ Zichtbaarheid", 
-                    # f"💨 Windsnelheid @ 10m", f"💨 Windsnelheid @ 80m", f"🧭 Windrichting", "Icoon tekst", "Icoon afbeelding"
-
-
-                
-                # Toevoegen aan de lijst van weergegevensregels
-                weather_info_lines.append(weather_info)
+
+        # Enkel de uren binnen de geselecteerde periode overhouden (in één keer, over alle kolommen)
+        window = frame.take(frame.time_of_day_mask(start_hour, end_hour))
+        weather_info_lines = format_weather_lines(window, language)
 
         # Conditie op basis van de weergavekeuze
         if display_option == "Per uur (afzonderlijk)":
@@ -0,0 +1,41 @@
+#endpoints.py - basis-URL's van alle externe API's, instelbaar via omgevingsvariabelen (bv. voor de lokale stand-in server)
+import os
+
+# Eén instelling om alle API's naar de lokale stand-in server (standin_server.py) te sturen,
+# bv. WEATHER_APP_STANDIN=http://127.0.0.1:8765
+STANDIN_URL = os.getenv("WEATHER_APP_STANDIN", "").rstrip("/")
+
+# Per API: (omgevingsvariabele, publieke basis-URL, prefix op de stand-in server)
+_BASES = {
+    "forecast": ("OPEN_METEO_FORECAST_BASE", "https://api.open-meteo.com", "/forecast"),
+    "historical": ("OPEN_METEO_HISTORICAL_BASE", "https://historical-forecast-api.open-meteo.com", "/historical"),
+    "nominatim": ("NOMINATIM_BASE", "https://nominatim.openstreetmap.org", "/nominatim"),
+    "sunrise-sunset": ("SUNRISE_SUNSET_BASE", "https://api.sunrise-sunset.org", "/sunrise-sunset"),
+}
+
+
+# Basis-URL van een API: eigen omgevingsvariabele, anders de stand-in server, anders de publieke URL
+def base_url(api):
+    variable, public, standin_prefix = _BASES[api]
+    if os.getenv(variable):
+        return os.getenv(variable).rstrip("/")
+    if STANDIN_URL:
+        return STANDIN_URL + standin_prefix
+    return public
+
+
+# Bij het opstarten vastgelegd, zodat alle modules dezelfde URL's gebruiken
+BASE_URLS = {api: base_url(api) for api in _BASES}
+
+FORECAST_API_URL = BASE_URLS["forecast"] + "/v1/forecast"
+HISTORICAL_API_URL = BASE_URLS["historical"] + "/v1/forecast"
+NOMINATIM_SEARCH_URL = BASE_URLS["nominatim"] + "/search"
+SUNRISE_SUNSET_URL = BASE_URLS["sunrise-sunset"] + "/json"
+
+
+# Welke API hoort bij een URL ("forecast", "historical", "nominatim", "sunrise-sunset"), of None
+def api_name(url):
+    for api, base in BASE_URLS.items():
+        if url.startswith(base + "/"):
+            return api
+    return None
@@ -1,8 +1,10 @@
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
 from datetime import datetime, timedelta
 import os
+from metrics import instrument
+from lazy import LAZY_PLACEHOLDER, lazy_expander
+from tile_proxy import tile_url
+from maps import OSM_LAYER, render_map
 
 # Haal de API-sleutel op uit de omgevingsvariabelen
 api_key = os.getenv("API_KEY_OPENWEATHERMAPS")
@@ -13,13 +15,27 @@ if api_key:
 else:
     st.write("API Key is niet gevonden!")  # Dit helpt bij troubleshooting
 
+# OpenWeatherMap temperatuurlaag met verhoogde opaciteit (voor helderdere kleuren); via de tegelproxy blijft
+# de API-sleutel op de server, zonder proxy staat ze in de tegel-URL (zonder proxy en sleutel: geen laag)
+TEMPERATURE_TILES = tile_url("owm_temp")
+TEMPERATURE_LAYER = (TEMPERATURE_TILES, "Map data © OpenWeatherMap", "Temperatuurkaart", True, True, 0.9) if TEMPERATURE_TILES else None
+
+@instrument("expander")
 def show_forecast1_expander():
     # Bepaal de datum van "vandaag + 1 dag"
     forecast_date = datetime.now() + timedelta(days=1)
     formatted_date = forecast_date.strftime("%Y/%m/%d")
-    
+    forecast1_expander_fragment(formatted_date)
+
+# Kaart-expander als fragment: een ander land kiezen voert enkel dit deel opnieuw uit (de kaart zelf is statisch)
+@st.fragment
+@instrument("fragment")
+def forecast1_expander_fragment(formatted_date):
     # Expander voor het kiezen van een land en het tonen van de temperatuurkaart
-    with st.expander(f"**Temperature Forecast Map / Temperatuur Weersverwachting Kaart: {formatted_date}**", expanded=False):
+    with lazy_expander("forecast1", f"**Temperature Forecast Map / Temperatuur Weersverwachting Kaart: {formatted_date}**") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
 
         # Dropdownlijst voor het kiezen van een land
         country_options = {
@@ -79,30 +95,14 @@ def show_forecast1_expander():
         # Kies de coördinaten voor het geselecteerde land
         coords = country_options.get(country, [50.8503, 4.3517])  # Standaard naar België als het land niet gevonden wordt
 
-        # Maak de Folium-kaart aan
-        m = folium.Map(location=coords, zoom_start=7)
-
-        # Voeg een lichte basiskaart toe voor beter contrast
-        folium.TileLayer(
-            tiles='https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png?lang=nl',
-            attr='© OpenStreetMap contributors',
-            name='Lichte basiskaart',
-            control=False
-        ).add_to(m)
-
-        # Voeg de OpenWeatherMap temperatuurlaag toe met verhoogde opaciteit
-        tile_url = f"https://tile.openweathermap.org/map/temp_new/{{z}}/{{x}}/{{y}}.png?appid=54fb4ec132c9baed8b35a4bac2b9f9e1"
-        folium.TileLayer(
-            tiles=tile_url,
-            attr='Map data © OpenWeatherMap',
-            name="Temperatuurkaart",
-            overlay=True,
-            control=True,
-            opacity=0.9  # Verhoogde opaciteit voor helderdere kleuren
-        ).add_to(m)
-
-        # Weergeef de kaart binnen Streamlit met st_folium
-        st_folium(m, width=700, height=700)
+        # Kaart met de lichte basiskaart en de temperatuurlaag; de HTML wordt per land gecachet en statisch
+        # getoond, zodat pannen en zoomen geen rerun veroorzaken
+        if TEMPERATURE_LAYER is None:
+            st.warning("Temperatuurlaag niet beschikbaar: stel API_KEY_OPENWEATHERMAPS of WEATHER_APP_TILE_PROXY in. / "
+                       "Temperature layer unavailable: set API_KEY_OPENWEATHERMAPS or WEATHER_APP_TILE_PROXY.")
+            render_map(coords, 7, [OSM_LAYER], width=700, height=700)
+        else:
+            render_map(coords, 7, [OSM_LAYER, TEMPERATURE_LAYER], width=700, height=700)
 
         legend_html = """
         <div style="width: 100%; margin-top: 10px;">
@@ -3,68 +3,129 @@
 
 import streamlit as st
 from datetime import datetime, timedelta
-from timezonefinder import TimezoneFinder
-import pytz
-import requests
-from dateutil.parser import parse
-from data import convert_visibility
+from timezones import get_local_timezone as resolve_local_timezone
+from openmeteo import OpenMeteoRequestsError
+from planner import register_view, fetch_view, fetch_view_batch
+from endpoints import FORECAST_API_URL
+from conversions import MISSING_LABEL, beaufort, beaufort_scalar, compass, compass_index, compass_scalar, visibility_km
+from prefetch import register_fetcher, get_prefetched
+from metrics import instrument, is_missing
+from lazy import LAZY_PLACEHOLDER, lazy_expander
 
 
-# Functie om windrichting om te zetten naar kompasrichting
+# Functie om windrichting om te zetten naar kompasrichting (zie conversions.compass)
 def wind_direction_to_compass(degree):
-    compass_points = [
-        "N", "NNO", "NO", "ONO", "O", "OZO", "ZO", "ZZO", "Z", "ZZW", "ZW", "WZW", "W", "WNW", "NW", "NNW"
-    ]
-    index = round(degree / 22.5) % 16
-    return compass_points[index]
+    return compass_scalar(degree)
 
 
-# Functie om windsnelheid om te zetten naar Beaufort
+# Functie om windsnelheid om te zetten naar Beaufort (zie conversions.beaufort)
 def wind_speed_to_beaufort(speed_kmh):
     if speed_kmh is None:
-        return "N/B"
-    beaufort_scale = [
-        (1, "0"), (5, "1"), (11, "2"), (19, "3"),
-        (28, "4"), (38, "5"), (49, "6"),
-        (61, "7"), (74, "8"), (88, "9"),
-        (102, "10"), (117, "11"), (float("inf"), "12")]
-    for threshold, description in beaufort_scale:
-        if speed_kmh <= threshold:
-            return description
-
-
-# Functie om de SVG-pijl te maken voor de windrichting
-def create_wind_icon(degree):
-    if degree is None:
-        return "N/B"
-
-    # Bereken de windrichting in graden voor de pijl (de pijl wijst de andere kant op, dus 180 graden verschuiven)
-    arrow_degree = (degree + 180) % 360
-
-    # SVG voor de pijl, gecentreerd in een box
-    arrow_svg = f"""
-    <div style="display: flex; justify-content: center; align-items: center; height: 100%;">
-        <svg width="30" height="30" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">
-            <g transform="rotate({arrow_degree}, 50, 50)">
-                <polygon points="50,5 60,35 50,25 40,35" fill="blue"/>
-                <line x1="50" y1="25" x2="50" y2="85" stroke="blue" stroke-width="12"/>
-            </g>
-        </svg>
-    </div>
-    """
-    return arrow_svg
+        return MISSING_LABEL
+    return str(beaufort_scalar(speed_kmh))
 
 
-# Functie om lokale tijdzone te bepalen
-def get_local_timezone(latitude, longitude):
-    tz_finder = TimezoneFinder()
-    timezone_str = tz_finder.timezone_at(lat=latitude, lng=longitude)
-    if not timezone_str:
+# Functie om lokale tijdzone te bepalen (gedeelde resolver, of de tijdzone uit het API-antwoord)
+def get_local_timezone(latitude, longitude, api_timezone=None):
+    local_timezone = resolve_local_timezone(latitude, longitude, api_timezone)
+    if not local_timezone:
         st.error("Tijdzone niet gevonden voor de opgegeven locatie.")
         return None
-    return pytz.timezone(timezone_str)
+    return local_timezone
+
+
+# Stijl en windpijl worden één keer per tabel meegestuurd; elke rij verwijst enkel naar een CSS-klasse
+# (16 sectoren van 22.5°, de pijl wijst met de wind mee, dus 180 graden verschoven)
+FORECAST_TABLE_STYLE = """
+<style>
+    table.forecast {width: 100%; border-collapse: collapse;}
+    table.forecast td, table.forecast th {padding: 5px; text-align: center; font-size: 0.85em;}
+    table.forecast tr {height: 40px;}
+    table.forecast tr.day th {text-align: left; font-size: 1.3em; padding-top: 20px;}
+    svg.wind-arrow {width: 30px; height: 30px; display: block; margin: auto;}
+""" + "".join(
+    f"    svg.wind-{sector} {{transform: rotate({(sector * 22.5 + 180) % 360}deg);}}\n" for sector in range(16)
+) + """</style>
+<svg width="0" height="0" style="position: absolute;">
+    <symbol id="wind-arrow" viewBox="0 0 100 100">
+        <polygon points="50,5 60,35 50,25 40,35" fill="blue"/>
+        <line x1="50" y1="25" x2="50" y2="85" stroke="blue" stroke-width="12"/>
+    </symbol>
+</svg>
+"""
+
+FORECAST_TABLE_HEADER = (
+    "<tr><th>🕒</th><th>🌡️</th><th>🌧️</th><th>☁️<br>Total</th><th>☁️<br>Low</th><th>☁️<br>Mid</th>"
+    "<th>☁️<br>High</th><th>👁️</th><th>💨<br>@10m</th><th>💨<br>@80m</th><th>🧭</th></tr>"
+)
+
+
+# Bouw de volledige voorspelling (alle dagen) als één HTML-tabel; geeft de HTML en het aantal rijen terug
+def render_forecast_table(window):
+    dates = window.date_labels()
+    times = window.hour_labels()
+    temperature = window["temperature_2m"]
+    precipitation = window["precipitation"]
+    cloud_cover = window["cloud_cover"]
+    cloud_low = window["cloud_cover_low"]
+    cloud_mid = window["cloud_cover_mid"]
+    cloud_high = window["cloud_cover_high"]
+    # Omrekeningen in één keer voor alle uren
+    visibility_km_values = visibility_km(window["visibility"])
+    beaufort_10m = beaufort(window["wind_speed_10m"])
+    beaufort_80m = beaufort(window["wind_speed_80m"])
+    sectors = compass_index(window["wind_direction_10m"])
+    compass_10m = compass(window["wind_direction_10m"])
+
+    rows = []
+    current_date = None
+    for i in range(len(times)):
+        if dates[i] != current_date:
+            current_date = dates[i]
+            rows.append(f'<tr class="day"><th colspan="11">Datum: {current_date}</th></tr>{FORECAST_TABLE_HEADER}')
+        arrow = f'<svg class="wind-arrow wind-{sectors[i]}"><use href="#wind-arrow"/></svg>' if sectors[i] >= 0 else MISSING_LABEL
+        rows.append(
+            f"<tr><td>{times[i]}</td><td>{temperature[i]:.1f}°C</td><td>{precipitation[i]:.1f}mm</td>"
+            f"<td>{cloud_cover[i]:.0f}%</td><td>{cloud_low[i]:.0f}%</td><td>{cloud_mid[i]:.0f}%</td>"
+            f"<td>{cloud_high[i]:.0f}%</td><td>{visibility_km_values[i]}Km</td><td>{beaufort_10m[i]}Bf</td>"
+            f"<td>{beaufort_80m[i]}Bf</td><td>{arrow}{compass_10m[i]}</td></tr>"
+        )
+    return f'{FORECAST_TABLE_STYLE}<table class="forecast">{"".join(rows)}</table>', len(times)
+
+
+FORECAST_HOURLY_VARIABLES = [
+    "temperature_2m", "precipitation", "cloud_cover", "cloud_cover_low", "cloud_cover_mid", "cloud_cover_high",
+    "visibility", "wind_speed_10m", "wind_speed_80m", "wind_direction_10m"
+]
+
+
+# Vaste periode van de voorspelling; weergaven met dezelfde URL en periode delen één aanvraag
+FORECAST_RANGE = {"timezone": "auto", "past_days": 1, "forecast_days": 5}
+
+register_view("forecast2", FORECAST_API_URL, hourly=FORECAST_HOURLY_VARIABLES, daily=["sunrise", "sunset"], **FORECAST_RANGE)
+
+
+# Functie om de voorspelling voor een locatie op te halen (aangemeld bij de orchestrator);
+# draait in een worker-thread, dus fouten worden door get_prefetched getoond
+@register_fetcher("forecast", section="forecast2", errors=OpenMeteoRequestsError,
+                  message="Fout bij het verbinden met de API")
+@instrument("fetch", failed=is_missing)
+def fetch_forecast_data(latitude, longitude, date=None):
+    # timezone=auto: Open-Meteo bepaalt de tijdzone zelf, zodat hier geen polygon-opzoeking nodig is
+    return fetch_view("forecast2", latitude, longitude)
+
+
+# Functie om de voorspelling voor meerdere locaties (lijst van (lat, lon)) in één aanvraag op te halen
+@instrument("fetch", failed=is_missing)
+def fetch_forecast_sites(sites):
+    try:
+        return fetch_view_batch("forecast2", sites)
+    except OpenMeteoRequestsError as err:
+        st.error(f"Fout bij het verbinden met de API: {err}")
+        return None
 
 
+@instrument("expander")
 def show_forecast2_expander():
     """
     Haalt gegevens op van de Open-Meteo API en toont deze in een Streamlit-expander,
@@ -80,129 +141,46 @@ def show_forecast2_expander():
         st.error("Locatiegegevens of zonsopkomst/zonsondergang ontbreken. Stel eerst de locatie in.")
         return
 
-    local_timezone = get_local_timezone(latitude, longitude)
-    if not local_timezone:
-        return
-
-    today = datetime.now(local_timezone)
-
-    # Bepaal de filtertijden van vandaag (gebruik deze voor ALLE dagen)
-    sunrise_time_today = local_timezone.localize(
-        datetime.strptime(sunrise, '%H:%M').replace(year=today.year, month=today.month, day=today.day)
-    )
-    sunset_time_today = local_timezone.localize(
-        datetime.strptime(sunset, '%H:%M').replace(year=today.year, month=today.month, day=today.day)
-    )
-    filter_start_time = sunrise_time_today - timedelta(hours=1)
-    filter_end_time = sunset_time_today + timedelta(hours=1)
-
-    API_URL = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={latitude}"
-        f"&longitude={longitude}"
-        "&hourly=temperature_2m,precipitation,cloud_cover,cloud_cover_low,cloud_cover_mid,cloud_cover_high,"
-        "visibility,wind_speed_10m,wind_speed_80m,wind_direction_10m"
-        "&daily=sunrise,sunset"
-        f"&timezone={local_timezone.zone}"
-        "&past_days=1"
-        "&forecast_days=5"
-    )
-
-    def fetch_weather_data(url):
-        # Definieer de headers binnen de functie
-        headers = {
-            "User-Agent": "StreamlitWeatherApp/1.0 (mailto:ydsdsy@gmail.com)"
-        }
-
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  # Controleer op HTTP-fouten
-            return response.json()  # Geef de JSON-gegevens terug
-        except requests.exceptions.HTTPError as http_err:
-            st.error(f"HTTP fout opgetreden: {http_err}")
-            return None
-        except requests.exceptions.RequestException as req_err:
-            st.error(f"Fout bij het verbinden met de API: {req_err}")
-            return None
-
-    # Haal de weersgegevens op met fetch_weather_data
-    weather_data = fetch_weather_data(API_URL)  # Deze regel voegt de missende initialisatie toe.
-
-    # Controleer of er gegevens zijn opgehaald
-    if weather_data:
-        with st.expander("Forecastdata / Weersvoorspelling"):
-            # Styling voor een compactere tabel
-            st.markdown(
-                """
-                <style>
-                    table {width: 100%; border-collapse: collapse;}
-                    td, th {padding: 5px; text-align: center; font-size: 0.85em;}
-                    tr {height: 40px;}
-                </style>
-                """, unsafe_allow_html=True
-            )
-            # Rest van je code om gegevens weer te geven...
-
-            # Toon uurlijkse gegevens
-            hourly = weather_data.get("hourly", {})
-            times = hourly.get("time", [])
-            temperature = hourly.get("temperature_2m", [])
-            precipitation = hourly.get("precipitation", [])
-            cloud_cover = hourly.get("cloud_cover", [])
-            cloud_low = hourly.get("cloud_cover_low", [])
-            cloud_mid = hourly.get("cloud_cover_mid", [])
-            cloud_high = hourly.get("cloud_cover_high", [])
-            visibility = hourly.get("visibility", [])
-            wind_speed_10m = hourly.get("wind_speed_10m", [])
-            wind_speed_80m = hourly.get("wind_speed_80m", [])
-            wind_direction_10m = hourly.get("wind_direction_10m", [])
-
-            if times:
-                current_date = None
-                for i in range(len(times)):
-                    # Haal datum en tijd op uit de tijdstempel
-                    timestamp = times[i]
-                    try:
-                        datetime_obj = parse(timestamp).astimezone(local_timezone)
-                    except ValueError:
-                        st.error(f"Ongeldige tijdstempel ontvangen: {timestamp}")
-                        continue
-
-                    # Gebruik sunrise/sunset filtering van vandaag
-                    if not (filter_start_time.time() <= datetime_obj.time() <= filter_end_time.time()):
-                        continue
-
-                    date, time = datetime_obj.strftime('%Y-%m-%d'), datetime_obj.strftime('%H:%M')
-                    if date != current_date:
-                        current_date = date
-                        st.markdown(f"### **Datum: {current_date}**")
-
-                    # Verkrijg windgegevens
-                    wind_dir_10 = wind_direction_10m[i] if i < len(wind_direction_10m) else None
-                    wind_icon_svg = create_wind_icon(wind_dir_10)
-                    # functie om de zichtbaarheid in kilometers om te zetten
-                    #zichtbaarheid_km = convert_visibility(visibility[i])
-
-                    # Toon gegevens in een tabelrij
-                    st.markdown(
-                        f"""
-                        <table>
-                        <tr>
-                            <td>🕒<br>{time}<br> </td>
-                            <td>🌡️<br>{temperature[i]}°C<br> </td>
-                            <td>🌧️<br>{precipitation[i]}mm<br> </td>
-                            <td>☁️<br>Total<br>{cloud_cover[i]}%</td>
-                            <td>☁️<br>Low<br>{cloud_low[i]}%</td>
-                            <td>☁️<br>Mid<br>{cloud_mid[i]}%</td>
-                            <td>☁️<br>High<br>{cloud_high[i]}%</td>
-                            <td>👁️<br>{convert_visibility(visibility[i])}Km<br> </td>
-                            <td>💨<br>@10m<br>{wind_speed_to_beaufort(wind_speed_10m[i])}Bf</td>
-                            <td>💨<br>@80m<br>{wind_speed_to_beaufort(wind_speed_80m[i])}Bf</td>
-                            <td>{wind_icon_svg}<br>{wind_direction_to_compass(wind_direction_10m[i])}<br> </td>
-                        </tr>
-                        </table>
-                        """,
-                        unsafe_allow_html=True
-                    )
-            else:
-                st.write("Geen uurlijkse gegevens beschikbaar.")
+    forecast2_expander_fragment(latitude, longitude, sunrise, sunset, st.session_state.get("selected_date"))
+
+# Inhoud van de voorspelling als fragment met expliciete invoer (wordt los van de rest van de pagina uitgevoerd)
+@st.fragment
+@instrument("fragment")
+def forecast2_expander_fragment(latitude, longitude, sunrise, sunset, selected_date):
+    # Pas ophalen en opbouwen als de gebruiker de expander opent
+    with lazy_expander("forecast2", "Forecastdata / Weersvoorspelling") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
+
+        # Haal de weersgegevens op (al gestart door de orchestrator in show_input_form als de expander open stond)
+        frame = get_prefetched("forecast", latitude, longitude, selected_date)
+
+        local_timezone = get_local_timezone(latitude, longitude, frame.timezone if frame is not None else None)
+        if not local_timezone or frame is None:
+            return
+
+        today = datetime.now(local_timezone)
+
+        # Bepaal de filtertijden van vandaag (gebruik deze voor ALLE dagen)
+        sunrise_time_today = local_timezone.localize(
+            datetime.strptime(sunrise, '%H:%M').replace(year=today.year, month=today.month, day=today.day)
+        )
+        sunset_time_today = local_timezone.localize(
+            datetime.strptime(sunset, '%H:%M').replace(year=today.year, month=today.month, day=today.day)
+        )
+        filter_start_time = sunrise_time_today - timedelta(hours=1)
+        filter_end_time = sunset_time_today + timedelta(hours=1)
+
+        # Toon uurlijkse gegevens, enkel de uren binnen het zonsopgang/zonsondergang-venster van vandaag
+        window = frame.take(frame.time_of_day_mask(filter_start_time.strftime('%H:%M'), filter_end_time.strftime('%H:%M')))
+
+        if len(window):
+            # De volledige tabel gaat als één element naar de browser
+            table_html, row_count = render_forecast_table(window)
+            st.markdown(table_html, unsafe_allow_html=True)
+            table_bytes = len(table_html.encode("utf-8"))
+            st.session_state["forecast_table_bytes"] = table_bytes
+            st.caption(f"{row_count} uren, {table_bytes / 1024:.1f} kB")
+        else:
+            st.write("Geen uurlijkse gegevens beschikbaar.")
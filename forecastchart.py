@@ -1,20 +1,24 @@
 import streamlit as st
 from datetime import datetime, timedelta
-import pytz
-import requests
-from dateutil.parser import parse
+from timezones import get_local_timezone as resolve_local_timezone
+from openmeteo import OpenMeteoRequestsError
+from planner import register_view, fetch_view
+from forecast2 import FORECAST_API_URL, FORECAST_RANGE
 from streamlit_echarts import st_echarts
+from metrics import instrument
+from lazy import LAZY_PLACEHOLDER, lazy_expander
 
-# Functie om lokale tijdzone te bepalen
-def get_local_timezone(latitude, longitude):
-    from timezonefinder import TimezoneFinder
-    tz_finder = TimezoneFinder()
-    timezone_str = tz_finder.timezone_at(lat=latitude, lng=longitude)
-    if not timezone_str:
+register_view("forecastchart", FORECAST_API_URL, hourly=["temperature_2m", "precipitation"], daily=["sunrise", "sunset"], **FORECAST_RANGE)
+
+# Functie om lokale tijdzone te bepalen (gedeelde resolver, of de tijdzone uit het API-antwoord)
+def get_local_timezone(latitude, longitude, api_timezone=None):
+    local_timezone = resolve_local_timezone(latitude, longitude, api_timezone)
+    if not local_timezone:
         st.error("Tijdzone niet gevonden voor de opgegeven locatie.")
         return None
-    return pytz.timezone(timezone_str)
+    return local_timezone
 
+@instrument("expander")
 def show_weather_chart_expander():
     """
     Haalt gegevens op van de Open-Meteo API en toont een EChart grafiek.
@@ -27,113 +31,88 @@ def show_weather_chart_expander():
     if not (latitude and longitude and sunrise and sunset):
         st.error("Locatiegegevens of zonsopgang/zonsondergang ontbreken. Stel eerst de locatie in.")
         return
+    weather_chart_fragment(latitude, longitude, sunrise, sunset)
 
-    local_timezone = get_local_timezone(latitude, longitude)
-    if not local_timezone:
-        return
-
-    API_URL = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={latitude}"
-        f"&longitude={longitude}"
-        "&hourly=temperature_2m,precipitation"
-        "&daily=sunrise,sunset"
-        f"&timezone={local_timezone.zone}"
-        "&past_days=1"
-        "&forecast_days=5"
-    )
+# Grafiek als fragment met expliciete invoer (wordt los van de rest van de pagina uitgevoerd)
+@st.fragment
+@instrument("fragment")
+def weather_chart_fragment(latitude, longitude, sunrise, sunset):
+    # Pas ophalen en opbouwen als de gebruiker de grafiek opent
+    with lazy_expander("chart", "Grafiek Weerdata (EChart)") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
 
-    # Haal gegevens op van de API
-    @st.cache_data
-    def fetch_weather_data(url):
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()
-        else:
+        # Zelfde plan als forecast2 (URL en periode), dus één gedeelde aanvraag per locatie
+        try:
+            frame = fetch_view("forecastchart", latitude, longitude)
+        except OpenMeteoRequestsError:
             st.error("Kan de weergegevens niet ophalen. Controleer de API URL.")
-            return None
-
-    weather_data = fetch_weather_data(API_URL)
+            frame = None
 
-    if weather_data:
-        # Zonsopgang en zonsondergang omzetten naar datetime
-        sunrise_time = local_timezone.localize(
-            datetime.strptime(sunrise, '%H:%M').replace(year=datetime.now().year, month=datetime.now().month, day=datetime.now().day)
-        )
-        sunset_time = local_timezone.localize(
-            datetime.strptime(sunset, '%H:%M').replace(year=datetime.now().year, month=datetime.now().month, day=datetime.now().day)
-        )
-        filter_start_time = sunrise_time - timedelta(hours=1)
-        filter_end_time = sunset_time + timedelta(hours=1)
+        if frame is not None:
+            local_timezone = get_local_timezone(latitude, longitude, frame.timezone)
+            if not local_timezone:
+                return
 
-        # Uurlijkse gegevens ophalen en filteren
-        hourly = weather_data.get("hourly", {})
-        times = hourly.get("time", [])
-        temperature = hourly.get("temperature_2m", [])
-        precipitation = hourly.get("precipitation", [])
+            # Zonsopgang en zonsondergang omzetten naar datetime
+            sunrise_time = local_timezone.localize(
+                datetime.strptime(sunrise, '%H:%M').replace(year=datetime.now().year, month=datetime.now().month, day=datetime.now().day)
+            )
+            sunset_time = local_timezone.localize(
+                datetime.strptime(sunset, '%H:%M').replace(year=datetime.now().year, month=datetime.now().month, day=datetime.now().day)
+            )
+            filter_start_time = sunrise_time - timedelta(hours=1)
+            filter_end_time = sunset_time + timedelta(hours=1)
 
-        times_filtered = []
-        temperatures_filtered = []
-        precipitation_filtered = []
+            # Uurlijkse gegevens filteren op het tijdvenster (views op de kolommen, geen kopie)
+            window = frame.select("temperature_2m", "precipitation").between(
+                filter_start_time.replace(tzinfo=None), filter_end_time.replace(tzinfo=None)
+            )
 
-        if times:
-            for i in range(len(times)):
-                # Haal datum en tijd op uit de tijdstempel
-                timestamp = times[i]
-                try:
-                    datetime_obj = parse(timestamp).astimezone(local_timezone)
-                except ValueError:
-                    continue
+            times_filtered = window.hour_labels().tolist()
+            temperatures_filtered = window["temperature_2m"].tolist()
+            precipitation_filtered = window["precipitation"].tolist()
 
-                # Filter gegevens buiten het gewenste bereik
-                if not (filter_start_time <= datetime_obj <= filter_end_time):
-                    continue
-
-                # Voeg gefilterde data toe aan de lijsten
-                times_filtered.append(datetime_obj.strftime('%H:%M'))
-                temperatures_filtered.append(temperature[i])
-                precipitation_filtered.append(precipitation[i])
-
-        # Maak een EChart grafiek met temperatuur en neerslag
-        echart_option = {
-            "tooltip": {
-                "trigger": "axis"
-            },
-            "legend": {
-                "data": ["Temperatuur", "Neerslag"]
-            },
-            "xAxis": {
-                "type": "category",
-                "boundaryGap": False,
-                "data": times_filtered
-            },
-            "yAxis": [
-                {"type": "value", "name": "Temperatuur (°C)", "position": "left"},
-                {"type": "value", "name": "Neerslag (mm)", "position": "right"}
-            ],
-            "series": [
-                {
-                    "name": "Temperatuur",
-                    "type": "line",
-                    "data": temperatures_filtered,
-                    "yAxisIndex": 0,
-                    "smooth": True,
-                    "itemStyle": {
-                        "color": "#FF6347"
-                    }
+            # Maak een EChart grafiek met temperatuur en neerslag
+            echart_option = {
+                "tooltip": {
+                    "trigger": "axis"
+                },
+                "legend": {
+                    "data": ["Temperatuur", "Neerslag"]
+                },
+                "xAxis": {
+                    "type": "category",
+                    "boundaryGap": False,
+                    "data": times_filtered
                 },
-                {
-                    "name": "Neerslag",
-                    "type": "bar",
-                    "data": precipitation_filtered,
-                    "yAxisIndex": 1,
-                    "itemStyle": {
-                        "color": "#1E90FF"
+                "yAxis": [
+                    {"type": "value", "name": "Temperatuur (°C)", "position": "left"},
+                    {"type": "value", "name": "Neerslag (mm)", "position": "right"}
+                ],
+                "series": [
+                    {
+                        "name": "Temperatuur",
+                        "type": "line",
+                        "data": temperatures_filtered,
+                        "yAxisIndex": 0,
+                        "smooth": True,
+                        "itemStyle": {
+                            "color": "#FF6347"
+                        }
+                    },
+                    {
+                        "name": "Neerslag",
+                        "type": "bar",
+                        "data": precipitation_filtered,
+                        "yAxisIndex": 1,
+                        "itemStyle": {
+                            "color": "#1E90FF"
+                        }
                     }
-                }
-            ]
-        }
+                ]
+            }
 
-        # Toon de EChart
-        with st.expander("Grafiek Weerdata (EChart)"):
+            # Toon de EChart
             st_echarts(options=echart_option, height="400px")
@@ -0,0 +1,114 @@
+#gazetteer.py - offline plaatsnamenlijst (Europa) met prefixindex voor autocomplete en geocoding zonder netwerk
+import gzip
+import os
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from heapq import nlargest
+
+import streamlit as st
+
+from gridcells import normalize_location
+
+# Gebundeld bestand (tab-gescheiden, gzip): naam, landcode, lat, lon, inwoners; gemaakt met build_gazetteer.py
+# uit GeoNames cities1000 (plaatsen vanaf 1000 inwoners, CC BY 4.0, geonames.org)
+GAZETTEER_PATH = os.getenv(
+    "WEATHER_APP_GAZETTEER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.tsv.gz")
+)
+SUGGESTION_LIMIT = 10
+
+# ISO-landcodes van de landen in invoer.EUROPEAN_COUNTRIES_EN (enkel deze landen komen in de lijst)
+COUNTRY_CODES = {
+    "Belgium": "BE", "Albania": "AL", "Andorra": "AD", "Armenia": "AM", "Austria": "AT", "Azerbaijan": "AZ",
+    "Bulgaria": "BG", "Bosnia and Herzegovina": "BA", "Croatia": "HR", "Cyprus": "CY", "Czech Republic": "CZ",
+    "Denmark": "DK", "Estonia": "EE", "Finland": "FI", "Georgia": "GE", "Germany": "DE", "Greece": "GR",
+    "Hungary": "HU", "Iceland": "IS", "Ireland": "IE", "Italy": "IT", "Kazakhstan": "KZ", "Kosovo": "XK",
+    "Latvia": "LV", "Liechtenstein": "LI", "Lithuania": "LT", "Luxembourg": "LU", "Malta": "MT", "Moldova": "MD",
+    "Monaco": "MC", "Montenegro": "ME", "Netherlands": "NL", "North Macedonia": "MK", "Norway": "NO",
+    "Poland": "PL", "Portugal": "PT", "Romania": "RO", "Russia": "RU", "San Marino": "SM", "Serbia": "RS",
+    "Slovakia": "SK", "Slovenia": "SI", "Spain": "ES", "Sweden": "SE", "Switzerland": "CH", "Turkey": "TR",
+    "Ukraine": "UA", "United Kingdom": "GB", "Vatican City": "VA",
+}
+
+
+# Zoeksleutel van een plaatsnaam: genormaliseerd en zonder accenten ("Liège" en "liege" vallen samen)
+def place_key(name):
+    decomposed = unicodedata.normalize("NFKD", normalize_location(name))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class Gazetteer:
+    """
+    Plaatsnamen als gesorteerde lijst van zoeksleutels met een parallelle lijst van (-inwoners, naam, land, lat, lon).
+    Een prefix komt overeen met één aaneengesloten bereik in de lijst (twee keer bisect), wat hetzelfde oplevert
+    als een prefixboom maar zonder een object per knoop.
+    """
+
+    def __init__(self, rows=()):
+        rows = sorted((place_key(name), -int(population), name, code or "", float(lat), float(lon))
+                      for name, code, lat, lon, population in rows)
+        self._keys = [row[0] for row in rows]
+        self._rows = [row[1:] for row in rows]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    # Indexbereik van alle sleutels die met de prefix beginnen
+    def _range(self, prefix):
+        first = bisect_left(self._keys, prefix)
+        return first, bisect_left(self._keys, prefix + "\U0010ffff", lo=first)
+
+    # Tot limit plaatsen (naam, landcode, lat, lon) die met de invoer beginnen, de grootste eerst
+    def complete(self, prefix, country_code=None, limit=SUGGESTION_LIMIT):
+        key = place_key(prefix)
+        if not key:
+            return []
+        first, last = self._range(key)
+        candidates = (
+            self._rows[i] for i in range(first, last) if country_code is None or self._rows[i][2] == country_code
+        )
+        places, seen = [], set()
+        for negative_population, name, code, lat, lon in nlargest(limit * 2, candidates, key=lambda row: -row[0]):
+            if (name, code) not in seen:
+                seen.add((name, code))
+                places.append((name, code, lat, lon))
+        return places[:limit]
+
+    # Coördinaten (lat, lon) van de grootste plaats met exact deze naam, of None
+    def resolve(self, name, country_code=None):
+        key = place_key(name)
+        first, last = bisect_left(self._keys, key), bisect_right(self._keys, key)
+        for _, _, code, lat, lon in self._rows[first:last]:  # binnen dezelfde sleutel staat de grootste vooraan
+            if country_code is None or code == country_code:
+                return lat, lon
+        return None
+
+    # Voeg een plaats toe (bv. een resultaat van Nominatim), zodat een volgende opzoeking offline kan;
+    # zonder landcode wordt "" bewaard (None is niet vergelijkbaar met een code bij het sorteren)
+    def add(self, name, country_code, lat, lon, population=0):
+        key = place_key(name)
+        row = (-int(population), name, country_code or "", float(lat), float(lon))
+        with self._lock:
+            index, last = bisect_left(self._keys, key), bisect_right(self._keys, key)
+            if any(existing[1:3] == row[1:3] for existing in self._rows[index:last]):
+                return
+            while index < last and self._rows[index] < row:
+                index += 1
+            self._keys.insert(index, key)
+            self._rows.insert(index, row)
+
+
+# Lees de gebundelde lijst; zonder bestand is de lijst leeg en gebeurt alles via Nominatim
+def load_gazetteer(path=GAZETTEER_PATH):
+    if not os.path.exists(path):
+        return Gazetteer()
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        rows = (line.rstrip("\n").split("\t") for line in handle if line.strip())
+        return Gazetteer((name, code, lat, lon, population) for name, code, lat, lon, population in rows)
+
+
+# Eén gedeelde lijst voor het hele proces (één keer geladen)
+@st.cache_resource
+def get_gazetteer():
+    return load_gazetteer()
@@ -0,0 +1,43 @@
+#gridcells.py - canonieke sleutels: genormaliseerde plaatsnamen en coördinaten afgerond op het modelrooster
+import unicodedata
+
+from endpoints import api_name
+
+# Roosterafstand (graden) van het fijnste model dat Open-Meteo in Europa gebruikt (ICON-D2, ~2 km);
+# punten binnen dezelfde cel krijgen van de API dezelfde gegevens terug
+MODEL_GRID_DEGREES = 0.02
+
+# Afwijkende roosters per API (zie endpoints.api_name), bv. als een endpoint enkel een grover model bedient
+GRID_DEGREES = {
+    "forecast": MODEL_GRID_DEGREES,
+    "historical": MODEL_GRID_DEGREES,
+}
+
+# Afronding voor lokale berekeningen (zon, tijdzone): 0.01° verschuift zonsopkomst met hooguit enkele seconden
+LOCAL_GRID_DEGREES = 0.01
+
+
+# Rond een coördinaat af op het dichtstbijzijnde roosterpunt (zonder float-ruis zoals 51.240000000000002)
+def snap_value(value, degrees):
+    return round(round(float(value) / degrees) * degrees, 6)
+
+
+# Rond een locatie af op het rooster
+def snap(lat, lon, degrees=MODEL_GRID_DEGREES):
+    return snap_value(lat, degrees), snap_value(lon, degrees)
+
+
+# Roosterafstand voor een API-URL
+def grid_degrees(url):
+    return GRID_DEGREES.get(api_name(url), MODEL_GRID_DEGREES)
+
+
+# Rond een locatie af op het rooster van het model achter de gegeven API-URL
+def snap_for(url, lat, lon):
+    return snap(lat, lon, grid_degrees(url))
+
+
+# Canonieke vorm van een plaatsnaam: Unicode-NFC, zonder overtollige spaties, hoofdletterongevoelig
+# ("Bredene", " bredene " en "BREDENE" geven dezelfde sleutel)
+def normalize_location(location):
+    return " ".join(unicodedata.normalize("NFC", location or "").split()).casefold()
@@ -0,0 +1,170 @@
+#hourlyframe.py - kolomgeoriënteerde uurdata (één NumPy-array per variabele) gedeeld door alle weergaven
+import numpy as np
+import pandas as pd
+
+# Klokuren "00:00" t.e.m. "23:59", zodat uurlabels met één array-opzoeking gemaakt worden
+_CLOCK_LABELS = np.array([f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(24 * 60)])
+
+
+# Zet "HH:MM" (of een datetime.time) om naar minuten sinds middernacht
+def _minutes(value):
+    if isinstance(value, str):
+        hours, minutes = value.split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    return value.hour * 60 + value.minute
+
+
+# Zet de UTC-tijdas in één keer om naar lokale tijd: DST-correct via de tijdzonenaam als die gekend is,
+# anders met de vaste UTC-offset uit het antwoord
+def _to_local_time(time, timezone, utc_offset_seconds):
+    if timezone and timezone not in ("GMT", "UTC"):
+        try:
+            local = pd.DatetimeIndex(time).tz_localize("UTC").tz_convert(timezone).tz_localize(None)
+            return local.to_numpy().astype("datetime64[s]")
+        except KeyError:
+            pass  # onbekende tijdzonenaam: val terug op de offset
+    return time + np.timedelta64(int(utc_offset_seconds), "s")
+
+
+class HourlyFrame:
+    """
+    Uurlijkse weergegevens als kolommen: een datetime64-tijdas (UTC) en per variabele één NumPy-array.
+    Tijdvensters (between) en projecties (select) geven views op dezelfde arrays terug, zonder kopie.
+    """
+
+    def __init__(self, time, columns, timezone=None, utc_offset_seconds=0, daily=None,
+                 latitude=None, longitude=None):
+        self.time = np.asarray(time).astype("datetime64[s]", copy=False)
+        self.columns = columns
+        self.timezone = timezone
+        self.utc_offset_seconds = int(utc_offset_seconds)
+        self.daily = daily or {}
+        self.latitude = latitude
+        self.longitude = longitude
+        self._local_time = None
+
+    # Maak een frame aan uit het resultaat van openmeteo.fetch_weather_arrays
+    @classmethod
+    def from_arrays(cls, weather_data):
+        hourly = dict(weather_data.get("hourly", {}))
+        time = hourly.pop("time", np.array([], dtype=np.int64))
+        return cls(
+            time,
+            hourly,
+            timezone=weather_data.get("timezone"),
+            utc_offset_seconds=weather_data.get("utc_offset_seconds", 0),
+            daily=weather_data.get("daily", {}),
+            latitude=weather_data.get("latitude"),
+            longitude=weather_data.get("longitude"),
+        )
+
+    # Voeg frames van dezelfde locatie samen tot één chronologische frame (latere frames winnen bij dubbele uren);
+    # enkel de variabelen die in alle frames voorkomen blijven over
+    @classmethod
+    def concat(cls, frames):
+        frames = [frame for frame in frames if frame is not None and len(frame)]
+        if not frames:
+            return None
+        names = [name for name in frames[0].columns if all(name in frame for frame in frames[1:])]
+        time = np.concatenate([frame.time for frame in frames])
+        # Stabiel sorteren en per tijdstip de laatste rij houden
+        order = np.argsort(time, kind="stable")
+        sorted_time = time[order]
+        keep = np.append(sorted_time[1:] != sorted_time[:-1], True)
+        index = order[keep]
+        first, last = frames[0], frames[-1]
+        return cls(
+            time[index],
+            {name: np.concatenate([frame.columns[name] for frame in frames])[index] for name in names},
+            timezone=last.timezone or first.timezone,
+            utc_offset_seconds=last.utc_offset_seconds,
+            daily=last.daily,
+            latitude=first.latitude,
+            longitude=first.longitude,
+        )
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    @property
+    def variables(self):
+        return list(self.columns)
+
+    # Lokale (naïeve) tijdas, één keer berekend voor de hele frame
+    @property
+    def local_time(self):
+        if self._local_time is None:
+            self._local_time = _to_local_time(self.time, self.timezone, self.utc_offset_seconds)
+        return self._local_time
+
+    # Minuten sinds lokale middernacht voor elk uur
+    def minutes_of_day(self):
+        local_time = self.local_time
+        return (local_time - local_time.astype("datetime64[D]")).astype("timedelta64[m]").astype(np.int64)
+
+    # Datumlabels "YYYY-MM-DD" voor alle uren tegelijk
+    def date_labels(self):
+        return np.datetime_as_string(self.local_time.astype("datetime64[D]"))
+
+    # Uurlabels "HH:MM" voor alle uren tegelijk
+    def hour_labels(self):
+        return _CLOCK_LABELS[self.minutes_of_day()]
+
+    # Kopie-vrije afgeleide frame met andere kolommen of een ander bereik
+    def _derive(self, index, columns):
+        derived = HourlyFrame(
+            self.time[index],
+            {name: array[index] for name, array in columns.items()},
+            timezone=self.timezone,
+            utc_offset_seconds=self.utc_offset_seconds,
+            daily=self.daily,
+            latitude=self.latitude,
+            longitude=self.longitude,
+        )
+        if self._local_time is not None:
+            derived._local_time = self._local_time[index]
+        return derived
+
+    # Dezelfde uren (en arrays), maar met de lokale tijd in een andere tijdzone
+    def with_timezone(self, timezone):
+        return HourlyFrame(self.time, self.columns, timezone=timezone, utc_offset_seconds=self.utc_offset_seconds,
+                           daily=self.daily, latitude=self.latitude, longitude=self.longitude)
+
+    # Projectie op een deel van de variabelen (dezelfde arrays, geen kopie)
+    def select(self, *names):
+        return self._derive(slice(None), {name: self.columns[name] for name in names})
+
+    # Tijdvenster [start, end] in lokale tijd (datetime of datetime64); geeft views terug
+    def between(self, start=None, end=None):
+        local_time = self.local_time
+        first = 0 if start is None else np.searchsorted(local_time, np.datetime64(start, "s"), side="left")
+        last = len(local_time) if end is None else np.searchsorted(local_time, np.datetime64(end, "s"), side="right")
+        return self._derive(slice(first, last), self.columns)
+
+    # Masker voor de uren waarvan het lokale tijdstip binnen [start, end] valt ("HH:MM"), voor elke dag
+    def time_of_day_mask(self, start, end):
+        minutes = self.minutes_of_day()
+        return (minutes >= _minutes(start)) & (minutes <= _minutes(end))
+
+    # Masker met een eigen venster per dag: days (datetime64[D], oplopend) met bijhorende lokale start- en eindtijden
+    # (datetime64); uren op dagen zonder venster (NaT of niet in days) vallen weg
+    def daily_window_mask(self, days, starts, ends):
+        local_time = self.local_time
+        days = np.asarray(days, dtype="datetime64[D]")
+        if not len(days):
+            return np.zeros(len(local_time), dtype=bool)
+        hour_days = local_time.astype("datetime64[D]")
+        index = np.minimum(np.searchsorted(days, hour_days), len(days) - 1)
+        starts = np.asarray(starts, dtype="datetime64[s]")[index]
+        ends = np.asarray(ends, dtype="datetime64[s]")[index]
+        return (days[index] == hour_days) & (local_time >= starts) & (local_time <= ends)
+
+    # Houd enkel de rijen uit een booleaans masker of indexlijst over (dit maakt wel een kopie)
+    def take(self, index):
+        return self._derive(index, self.columns)
@@ -0,0 +1,142 @@
+#http_cache.py - persistente HTTP-cache (SQLite via requests-cache) met vervaltijden per API-endpoint
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+from requests_cache import NEVER_EXPIRE, CachedSession
+
+from endpoints import api_name
+from metrics import record_http
+
+# Locatie en grootte van de cache (overleeft een herstart van het proces)
+CACHE_NAME = os.getenv("WEATHER_APP_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"))
+CACHE_MAX_BYTES = int(os.getenv("WEATHER_APP_CACHE_MAX_MB", "200")) * 1024 * 1024
+SIZE_CHECK_INTERVAL = 50  # controleer de grootte na elke 50 nieuwe (niet-gecachete) antwoorden
+EVICT_FRACTION = 0.1  # aandeel van de items dat per ronde verwijderd wordt als de cache te groot is
+
+# Vervaltijden per soort antwoord
+GEOCODING_EXPIRE = timedelta(weeks=3)
+DEFAULT_EXPIRE = timedelta(hours=1)
+MODEL_UPDATE_HOURS = 1  # Open-Meteo verwerkt elk uur nieuwe modelruns
+MODEL_PUBLISH_DELAY = timedelta(minutes=10)  # marge tot een nieuwe run effectief beschikbaar is
+
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_stats_lock = threading.Lock()
+
+
+# Haal de queryparameters op uit de URL en/of de meegegeven params
+def _query(url, params):
+    query = {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+    if params:
+        query.update({key: str(value) for key, value in dict(params).items()})
+    return query
+
+
+# Tijdstip waarop de volgende modelrun van de voorspelling beschikbaar zou moeten zijn
+def _next_model_run(now=None):
+    now = now or datetime.now(timezone.utc)
+    run = now.replace(minute=0, second=0, microsecond=0)
+    run -= timedelta(hours=run.hour % MODEL_UPDATE_HOURS)
+    while run + MODEL_PUBLISH_DELAY <= now:
+        run += timedelta(hours=MODEL_UPDATE_HOURS)
+    return run + MODEL_PUBLISH_DELAY
+
+
+# Bepaal de vervaltijd van een antwoord op basis van het endpoint en de gevraagde periode
+def expire_after_for(url, params=None):
+    api = api_name(url)
+    query = _query(url, params)
+
+    if api == "sunrise-sunset":
+        return NEVER_EXPIRE  # zontijden voor een vaste datum veranderen niet
+    if api == "nominatim":
+        return GEOCODING_EXPIRE
+    if api == "historical":
+        end_date = query.get("end_date")
+        if end_date and date.fromisoformat(end_date) < datetime.now(timezone.utc).date():
+            return NEVER_EXPIRE  # volledig verleden dagen zijn definitief
+        return _next_model_run()
+    if api == "forecast":
+        return _next_model_run()
+    return DEFAULT_EXPIRE
+
+
+# Houd het aantal cache-hits en -misses bij
+def record_response(response):
+    key = "hits" if getattr(response, "from_cache", False) else "misses"
+    with _stats_lock:
+        _stats[key] += 1
+        return _stats["misses"]
+
+
+# Geef een kopie van de tellers terug (hits, misses, evictions en hit rate)
+def get_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
+
+
+# Houd de cache onder CACHE_MAX_BYTES: eerst verlopen items weg, daarna de items die het snelst
+# zouden vervallen (items zonder vervaldatum, zoals historische dagen, gaan als laatste)
+def enforce_size_limit(session, max_bytes=CACHE_MAX_BYTES):
+    cache = session.cache
+    if cache.responses.size() <= max_bytes:
+        return
+    cache.delete(expired=True)
+
+    table = cache.responses.table_name
+    while cache.responses.size() > max_bytes:
+        with cache.responses.connection() as con:
+            count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            if not count:
+                break
+            keys = [
+                row[0]
+                for row in con.execute(
+                    f"SELECT key FROM {table} ORDER BY expires IS NULL, expires, rowid LIMIT ?",
+                    (max(1, int(count * EVICT_FRACTION)),),
+                )
+            ]
+        cache.delete(*keys, vacuum=False)
+        cache.responses.vacuum()
+        with _stats_lock:
+            _stats["evictions"] += len(keys)
+
+
+# CachedSession met een standaard-timeout, vervaltijden per endpoint, hit/miss-tellers en metingen per API
+class PolicyCachedSession(CachedSession):
+    def __init__(self, timeout, **kwargs):
+        super().__init__(**kwargs)
+        self.timeout = timeout
+
+    def request(self, method, url, *args, params=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        if kwargs.get("expire_after") is None:
+            kwargs["expire_after"] = expire_after_for(url, params)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, params=params, **kwargs)
+        except Exception:
+            record_http(api_name(url), False, 0, time.perf_counter() - start, error=True)
+            raise
+        record_http(api_name(url), response.from_cache, len(response.content), time.perf_counter() - start,
+                    error=response.status_code >= 400)
+        misses = record_response(response)
+        if not response.from_cache and misses % SIZE_CHECK_INTERVAL == 0:
+            enforce_size_limit(self)
+        return response
+
+
+# Maak de gecachete sessie aan (SQLite-bestand op schijf)
+def create_cached_session(timeout):
+    return PolicyCachedSession(
+        timeout,
+        cache_name=CACHE_NAME,
+        backend="sqlite",
+        allowable_codes=(200,),
+        stale_if_error=True,  # bij een storing liever (verlopen) gecachete data dan een foutmelding
+    )
@@ -0,0 +1,56 @@
+#http_client.py - gedeelde HTTP-client voor alle externe API's (Open-Meteo, Nominatim, sunrise-sunset)
+import threading
+
+from requests.adapters import HTTPAdapter
+from retry_requests import retry
+
+from http_cache import create_cached_session
+
+# Instellingen van de gedeelde client
+DEFAULT_TIMEOUT = 10  # seconden tot de eerste bytes van het antwoord
+POOL_CONNECTIONS = 10  # aantal hosts waarvoor een eigen verbindingspool bijgehouden wordt
+POOL_MAXSIZE = 20  # maximum aantal open (keep-alive) verbindingen per host
+RETRIES = 3
+BACKOFF_FACTOR = 0.5  # wachttijd tussen pogingen: 0.5s, 1s, 2s, ...
+STATUS_TO_RETRY = (429, 500, 502, 503, 504)
+USER_AGENT = "StreamLit-Weather-app/1.0 (ydsdsy@gmail.com)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# Bouw één (gecachete) requests.Session met timeouts, retries met exponentiële backoff en een grotere verbindingspool
+def _build_session():
+    session = retry(
+        create_cached_session(timeout=DEFAULT_TIMEOUT),
+        retries=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_to_retry=STATUS_TO_RETRY,
+    )
+
+    # retry-requests mount een adapter met de standaard poolgrootte; vervang die door een
+    # adapter met dezelfde retry-configuratie maar een grotere pool per host
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=session.get_adapter("https://").max_retries,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+# Geef de gedeelde sessie terug (wordt één keer per proces aangemaakt, ook over alle gebruikers heen)
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+# Vervanger voor requests.get die via de gedeelde sessie loopt (hergebruik van TCP/TLS-verbindingen)
+def http_get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT):
+    return get_session().get(url, params=params, headers=headers, timeout=timeout)
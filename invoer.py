@@ -2,8 +2,15 @@
 import streamlit as st
 from datetime import datetime, timedelta
 import requests
-from timezonefinder import TimezoneFinder
-import pytz
+from http_client import http_get
+from timezones import timezone_name_at
+import numpy as np
+from prefetch import start_prefetch
+from solar import local_sun_events
+from gridcells import LOCAL_GRID_DEGREES, normalize_location, snap
+from gazetteer import COUNTRY_CODES, get_gazetteer, place_key
+from endpoints import NOMINATIM_SEARCH_URL
+from metrics import instrument, is_missing
 
 # Lijst van Europese landen in Engels en Nederlands
 EUROPEAN_COUNTRIES_EN = [
@@ -20,88 +27,76 @@ EUROPEAN_COUNTRIES_NL = [
     "Kroatië", "Cyprus", "Tsjechië", "Denemarken", "Estland", "Finland", "Georgië", "Duitsland", 
     "Griekenland", "Hongarije", "IJsland", "Ierland", "Italië", "Kazachstan", "Kosovo", "Letland", "Liechtenstein", 
     "Litouwen", "Luxemburg", "Malta", "Moldavië", "Monaco", "Montenegro", "Nederland", "Noord-Macedonië", 
-    "Noorwegen", "Polen", "Portugal", "Roemenië", "Rusland", "San Marino", "Servië", "Slovenië", "Slovenië", 
+    "Noorwegen", "Polen", "Portugal", "Roemenië", "Rusland", "San Marino", "Servië", "Slowakije", "Slovenië", 
     "Spanje", "Zweden", "Zwitserland", "Turkije", "Oekraïne", "Verenigd Koninkrijk", "Vaticaanstad"
 ]
 
-# Functie om GPS-coördinaten op te halen via geocoding service
+# Functie om GPS-coördinaten op te halen: eerst uit de offline plaatsnamenlijst, anders via Nominatim
+# (de cache van Nominatim werkt op de genormaliseerde plaatsnaam)
+@instrument("fetch", failed=is_missing)
+def get_gps_coordinates(location, country_code=None):
+    place = get_gazetteer().resolve(location, country_code)
+    if place:
+        return place
+    return geocode_location(normalize_location(location), country_code)
 
 @st.cache_data
-def get_gps_coordinates(location):
-    api_url = f"https://nominatim.openstreetmap.org/search?q={location}&format=json&addressdetails=1&limit=1"
-    headers = {
-        'User-Agent': 'StreamLit-Weather-app/1.0 (ydsdsy@gmail.com)'  # Voeg je eigen app naam en contact e-mail toe
-    }
+def geocode_location(location, country_code=None):
     try:
-        response = requests.get(api_url, headers=headers)
-        response.raise_for_status()  # Zorgt ervoor dat fouten goed worden afgehandeld
-        data = response.json()
-        if data:
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            return lat, lon
-        else:
-            st.error(f"Locatie '{location}' niet gevonden.")
-            return None, None
+        place = nominatim_search(location, country_code)
     except requests.RequestException as e:
         st.error(f"Fout bij het ophalen van GPS-coördinaten voor locatie '{location}': {e}")
-        return None, None# Functie om zonsopkomst, zonsondergang, en schemeringstijden te berekenen
-@st.cache_data
+        return None, None
+    if place is None:
+        st.error(f"Locatie '{location}' niet gevonden.")
+        return None, None
+    # Onthoud het resultaat in de plaatsnamenlijst, zodat de volgende opzoeking offline kan
+    get_gazetteer().add(location, country_code, *place)
+    return place
+
+# Functie om een plaats op te zoeken bij Nominatim zonder Streamlit: (lat, lon) of None; netwerkfouten gaan naar de oproeper
+def nominatim_search(location, country_code=None):
+    api_url = f"{NOMINATIM_SEARCH_URL}?q={location}&format=json&addressdetails=1&limit=1"
+    if country_code:
+        api_url += f"&countrycodes={country_code.lower()}"
+    headers = {
+        'User-Agent': 'StreamLit-Weather-app/1.0 (ydsdsy@gmail.com)'  # Voeg je eigen app naam en contact e-mail toe
+    }
+    response = http_get(api_url, headers=headers)
+    response.raise_for_status()  # Zorgt ervoor dat fouten goed worden afgehandeld
+    data = response.json()
+    if not data:
+        return None
+    return float(data[0]["lat"]), float(data[0]["lon"])
+
+# Volgorde van de zontijden zoals get_sun_times ze teruggeeft
+SUN_TIME_NAMES = ("sunrise", "sunset", "civil_twilight_begin", "civil_twilight_end",
+                  "nautical_twilight_begin", "nautical_twilight_end")
+
+# Functie om zonsopkomst, zonsondergang, en schemeringstijden te berekenen (cache per roostercel van 0.01°)
+@instrument("fetch", failed=is_missing)
 def get_sun_times(lat, lon, date):
-    tz_finder = TimezoneFinder()
-    timezone_str = tz_finder.timezone_at(lng=lon, lat=lat)
+    return compute_sun_times(*snap(lat, lon, LOCAL_GRID_DEGREES), date)
+
+@st.cache_data
+def compute_sun_times(lat, lon, date):
+    timezone_str = timezone_name_at(lat, lon)  # gedeelde TimezoneFinder met cache
     
     if not timezone_str:
         st.error("Timezone not found for the specified location.")
         return None, None, None, None, None, None
 
-    api_url = f"https://api.sunrise-sunset.org/json?lat={lat}&lng={lon}&date={date}&formatted=0"
-    try:
-        response = requests.get(api_url)
-        data = response.json()
-        
-        if 'results' in data:
-            results = data['results']
-            
-            # Converteer tijden naar datetime-objecten
-            sunrise_utc = datetime.fromisoformat(results['sunrise'])
-            sunset_utc = datetime.fromisoformat(results['sunset'])
-            civil_twilight_begin_utc = datetime.fromisoformat(results['civil_twilight_begin'])
-            civil_twilight_end_utc = datetime.fromisoformat(results['civil_twilight_end'])
-            nautical_twilight_begin_utc = datetime.fromisoformat(results['nautical_twilight_begin'])
-            nautical_twilight_end_utc = datetime.fromisoformat(results['nautical_twilight_end'])
-            
-            # Zet de tijden om naar lokale tijdzone
-            local_tz = pytz.timezone(timezone_str)
-            
-            # Localize de tijden en pas zonetijd toe
-            sunrise_local = sunrise_utc.astimezone(local_tz)
-            sunset_local = sunset_utc.astimezone(local_tz)
-            civil_twilight_begin_local = civil_twilight_begin_utc.astimezone(local_tz)
-            civil_twilight_end_local = civil_twilight_end_utc.astimezone(local_tz)
-            nautical_twilight_begin_local = nautical_twilight_begin_utc.astimezone(local_tz)
-            nautical_twilight_end_local = nautical_twilight_end_utc.astimezone(local_tz)
-            
-            # Formatteer de tijden in het juiste formaat
-            sun_times = {
-                "sunrise": sunrise_local.strftime('%H:%M'),
-                "sunset": sunset_local.strftime('%H:%M'),
-                "civil_twilight_begin": civil_twilight_begin_local.strftime('%H:%M'),
-                "civil_twilight_end": civil_twilight_end_local.strftime('%H:%M'),
-                "nautical_twilight_begin": nautical_twilight_begin_local.strftime('%H:%M'),
-                "nautical_twilight_end": nautical_twilight_end_local.strftime('%H:%M')
-            }
-            
-            return (sun_times['sunrise'], sun_times['sunset'], 
-                    sun_times['civil_twilight_begin'], sun_times['civil_twilight_end'],
-                    sun_times['nautical_twilight_begin'], sun_times['nautical_twilight_end'])
-        else:
-            st.error("Sunrise and sunset times not found.")
-            return None, None, None, None, None, None
-            
-    except requests.RequestException as e:
-        st.error(f"Error fetching sunrise/sunset times: {e}")
-        return None, None, None, None, None, None
+    sun_times = sun_times_table(lat, lon, [date], timezone_str)
+    return tuple(sun_times[name][0] for name in SUN_TIME_NAMES)
+
+# Functie om de zontijden (HH:MM in de lokale tijdzone, None als de gebeurtenis niet plaatsvindt) voor een lijst
+# van datums te berekenen, zonder Streamlit (NOAA-algoritme, zonder externe API); naam -> lijst per datum
+def sun_times_table(lat, lon, dates, timezone_str):
+    events = local_sun_events(np.asarray(dates, dtype="datetime64[D]"), lat, lon, timezone_str)
+    return {
+        name: [None if np.isnat(value) else value.item().strftime('%H:%M') for value in events[name]]
+        for name in SUN_TIME_NAMES
+    }
 
 # De invoerfunctie die de gegevens toont en de invoer mogelijk maakt
 def show_input_form():
@@ -163,16 +158,29 @@ def show_input_form():
         # Formulier voor het invoeren van gegevens
         country = st.selectbox(country_label, countries, index=countries.index(default_country))  # Lijst van Europese landen
         location = st.text_input(location_label, value=default_location)
+        country_code = COUNTRY_CODES.get(EUROPEAN_COUNTRIES_EN[countries.index(country)])
+
+        # Autocomplete uit de offline plaatsnamenlijst: andere plaatsen die met de invoer beginnen worden voorgesteld;
+        # de ingetypte naam blijft de standaardkeuze, een suggestie geldt enkel als de gebruiker ze kiest
+        suggestions = [name for name, _, _, _ in get_gazetteer().complete(location, country_code)
+                       if place_key(name) != place_key(location)]
+        if suggestions:
+            location = st.selectbox("Suggesties / Suggestions", [location] + suggestions, index=0,
+                                    format_func=lambda name: f"{name} (ingetypt / as typed)" if name == location else name)
+
         selected_date = st.date_input(date_label, value=selected_date)
         
         # Verkrijg de GPS-coördinaten voor de nieuwe locatie
-        latitude, longitude = get_gps_coordinates(location)
+        latitude, longitude = get_gps_coordinates(location, country_code)
 
         if latitude is None or longitude is None:
             st.error(f"Could not retrieve GPS coordinates for {location}. Please try again.")
             return None, None, None
 
-        # Haal zonsopkomst en zonsondergang tijden op
+        # Start alle externe oproepen van deze rerun (historische data, voorspelling) tegelijk
+        start_prefetch(latitude, longitude, selected_date)
+
+        # Bereken zonsopkomst en zonsondergang tijden (lokaal, zonder netwerk)
         sunrise, sunset, civil_twilight_begin, civil_twilight_end, nautical_twilight_begin, nautical_twilight_end = get_sun_times(latitude, longitude, selected_date)
 
         # Automatisch begin- en einduur instellen op basis van de civiele schemering
@@ -197,6 +205,7 @@ def show_input_form():
 
         # Sla de gegevens op in st.session_state
         st.session_state["country"] = country
+        st.session_state["country_code"] = country_code
         st.session_state["latitude"] = latitude
         st.session_state["longitude"] = longitude
         st.session_state["location"] = location
@@ -0,0 +1,29 @@
+#lazy.py - uitklapvakken die pas ophalen en opbouwen als de gebruiker ze opent; de open/dicht-stand blijft in session_state
+import streamlit as st
+
+# Tekst in een gesloten uitklapvak (de inhoud wordt pas bij het openen gemaakt)
+LAZY_PLACEHOLDER = "Open om te laden / Open to load"
+
+
+# Sleutel in session_state met de open/dicht-stand van een uitklapvak
+def section_key(name):
+    return f"open_{name}"
+
+
+# Staat het uitklapvak open? (bv. om vooraf enkel de gegevens van open uitklapvakken op te halen)
+def is_open(name):
+    return bool(st.session_state.get(section_key(name)))
+
+
+def lazy_expander(name, label):
+    """
+    Uitklapvak dat zijn open/dicht-stand bijhoudt (st.session_state["open_<naam>"]) en bij openen of sluiten
+    opnieuw uitvoert (binnen een fragment enkel dat fragment). Gebruik:
+
+        with lazy_expander("data", "Weergegevens") as expander:
+            if not expander.open:
+                st.caption(LAZY_PLACEHOLDER)
+                return
+            ...  # ophalen en opbouwen
+    """
+    return st.expander(label, key=section_key(name), on_change="rerun")
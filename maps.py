@@ -1,21 +1,67 @@
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
+from metrics import instrument
+from lazy import LAZY_PLACEHOLDER, lazy_expander
+from tile_proxy import tile_url
+
+MAP_CACHE_ENTRIES = 256  # gecachete kaarten (elk enkele kB HTML)
+COORDINATE_DECIMALS = 4  # ~10 m: nabije invoer deelt dezelfde kaart
+
+# Basislaag van alle kaarten: (tegel-URL, attributie, naam, overlay, control, opaciteit)
+OSM_LAYER = (tile_url("osm"), "© OpenStreetMap contributors", "Lichte basiskaart", False, False, 1.0)
+
+
+# Bouw een folium-kaart uit een middelpunt, zoomniveau, tegellagen en markers (lat, lon, popup)
+def build_map(center, zoom, layers, markers=()):
+    m = folium.Map(location=list(center), zoom_start=zoom, tiles=None)
+    for tiles, attr, name, overlay, control, opacity in layers:
+        folium.TileLayer(tiles=tiles, attr=attr, name=name, overlay=overlay, control=control, opacity=opacity).add_to(m)
+    for lat, lon, popup in markers:
+        folium.Marker([lat, lon], popup=popup).add_to(m)
+    return m
+
+
+# Volledige HTML van een kaart, gecachet per (middelpunt, zoom, lagen, markers): een rerun bouwt de kaart niet opnieuw
+@st.cache_data(max_entries=MAP_CACHE_ENTRIES, show_spinner=False)
+def map_html(center, zoom, layers, markers=()):
+    return build_map(center, zoom, layers, markers).get_root().render()
+
+
+def render_map(center, zoom, layers, markers=(), width=700, height=500, clicks=False):
+    """
+    Toon een kaart. Standaard statisch: de gecachete HTML in een iframe, zonder terugkoppeling naar Python,
+    zodat pannen en zoomen geen rerun veroorzaken. Met clicks=True wordt st_folium gebruikt, dat enkel de
+    laatste klik teruggeeft (en dan ook enkel bij een klik opnieuw uitvoert).
+    """
+    # Middelpunt en markers afgerond, zodat nabije invoer dezelfde gecachete kaart deelt
+    center = (round(center[0], COORDINATE_DECIMALS), round(center[1], COORDINATE_DECIMALS))
+    markers = tuple((round(lat, COORDINATE_DECIMALS), round(lon, COORDINATE_DECIMALS), popup) for lat, lon, popup in markers)
+    layers = tuple(layers)
+    if clicks:
+        return st_folium(build_map(center, zoom, layers, markers), width=width, height=height,
+                         returned_objects=["last_clicked"])
+    st.iframe(map_html(center, zoom, layers, markers), width=width, height=height)
+    return None
 
 # Toon een kaart in een expander
+@instrument("expander")
 def show_map_expander():
     # Haal de locatiegegevens uit de session_state
     latitude = st.session_state.get("latitude", 51.2389)  # Gebruik standaard als geen waarde is
     longitude = st.session_state.get("longitude", 2.9724)
     location = st.session_state.get("location", "Unknown")
+    map_expander_fragment(latitude, longitude, location)
 
+# Kaart als fragment met expliciete invoer (de kaart zelf is statisch en stuurt niets terug)
+@st.fragment
+@instrument("fragment")
+def map_expander_fragment(latitude, longitude, location):
     # Toon een kaart in een expander
-    with st.expander("**Map/Kaart**", expanded=False):
-        # Creëer de folium kaart
-        m = folium.Map(location=[latitude, longitude], zoom_start=9)
-
-        # Voeg een marker toe voor de locatie
-        folium.Marker([latitude, longitude], popup=location).add_to(m)
-
-        # Render de kaart in Streamlit
-        st_folium(m, width=700, height=500)
+    with lazy_expander("map", "**Map/Kaart**") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
+        # Kaart met een marker voor de locatie; tegels via de lokale tegelproxy als die ingesteld is
+        # (WEATHER_APP_TILE_PROXY), anders rechtstreeks bij OSM
+        render_map((latitude, longitude), 9, [OSM_LAYER], [(latitude, longitude, location)], width=700, height=500)
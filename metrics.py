@@ -0,0 +1,270 @@
+#metrics.py - meetpunten per rerun: duur, bytes, cache-hits/-misses en fouten van ophalingen en expanders,
+#zichtbaar in een debug-expander (?debug=1 of WEATHER_APP_DEBUG=1) en als Prometheus-tekst (bestand en/of HTTP-endpoint)
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Instellingen via omgevingsvariabelen
+DEBUG = os.getenv("WEATHER_APP_DEBUG", "") not in ("", "0")
+METRICS_FILE = os.getenv("WEATHER_APP_METRICS_FILE")  # bv. voor de textfile-collector van node_exporter
+METRICS_PORT = int(os.getenv("WEATHER_APP_METRICS_PORT", "0"))  # 0 = geen HTTP-endpoint
+PREFIX = "weather_app"
+
+# Grenzen (seconden) van de histogrammen
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Tellers voor het hele proces (alle sessies samen): (soort, naam) -> waarden, api -> waarden
+_calls = {}
+_http = {}
+_reruns = {"count": 0, "seconds": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)}
+_lock = threading.Lock()
+
+# Per thread de stapel van lopende gemeten oproepen, zodat HTTP-verkeer aan de juiste oproep toegewezen wordt
+_active = threading.local()
+
+
+# Is er een sessie (ScriptRunContext) in deze thread? Buiten Streamlit (CLI, benchmarks) enkel procestellers
+def _rerun_state():
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get("rerun_metrics")
+
+
+def _observe(buckets, seconds):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            buckets[i] += 1
+
+
+# Mislukte ophaling: None of een tuple met enkel None (zoals get_gps_coordinates teruggeeft)
+def is_missing(result):
+    return result is None or (isinstance(result, tuple) and all(value is None for value in result))
+
+
+# Cache-uitkomst van één oproep op basis van het HTTP-verkeer dat ze veroorzaakte
+def _cache_outcome(traffic):
+    if traffic["misses"]:
+        return "network"
+    if traffic["hits"]:
+        return "http-cache"
+    return "memory"
+
+
+def instrument(kind, name=None, failed=None):
+    """
+    Decorator die elke oproep meet: duur, HTTP-aanvragen/bytes (ook vanuit geneste oproepen in dezelfde thread),
+    de cache-uitkomst ("memory" zonder HTTP, "http-cache" of "network") en fouten. Een uitzondering telt als fout,
+    net als een resultaat waarvoor failed(result) waar is.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            traffic = {"hits": 0, "misses": 0, "bytes": 0}
+            stack = _active.__dict__.setdefault("stack", [])
+            stack.append(traffic)
+            error = True
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                error = bool(failed and failed(result))
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                stack.pop()
+                record_call(kind, label, seconds, error, traffic)
+        return wrapper
+    return decorator
+
+
+# Leg één gemeten oproep vast, voor het proces en (als er een sessie is) voor de huidige rerun
+def record_call(kind, name, seconds, error=False, traffic=None):
+    traffic = traffic or {"hits": 0, "misses": 0, "bytes": 0}
+    with _lock:
+        entry = _calls.setdefault((kind, name), {
+            "count": 0, "errors": 0, "seconds": 0.0, "buckets": [0] * len(LATENCY_BUCKETS),
+            "memory": 0, "http-cache": 0, "network": 0,
+        })
+        entry["count"] += 1
+        entry["errors"] += error
+        entry["seconds"] += seconds
+        entry[_cache_outcome(traffic)] += 1
+        _observe(entry["buckets"], seconds)
+
+    state = _rerun_state()
+    if state is not None:
+        state["calls"].append({
+            "kind": kind, "name": name, "ms": seconds * 1000, "error": error, "cache": _cache_outcome(traffic),
+            "requests": traffic["hits"] + traffic["misses"], "bytes": traffic["bytes"],
+        })
+
+
+# Leg één HTTP-aanvraag vast (vanuit http_cache.PolicyCachedSession): api, uit de cache of niet, bytes, duur, fout
+def record_http(api, from_cache, size, seconds, error=False):
+    api = api or "other"
+    with _lock:
+        entry = _http.setdefault(api, {"hits": 0, "misses": 0, "errors": 0, "bytes": 0, "seconds": 0.0})
+        entry["errors" if error else ("hits" if from_cache else "misses")] += 1
+        entry["bytes"] += size
+        entry["seconds"] += seconds
+    if not error:
+        for traffic in getattr(_active, "stack", ()):
+            traffic["hits" if from_cache else "misses"] += 1
+            traffic["bytes"] += size
+
+    state = _rerun_state()
+    if state is not None:
+        state["http"].append({"api": api, "cache": "error" if error else ("hit" if from_cache else "miss"),
+                              "bytes": size, "ms": seconds * 1000})
+
+
+# Begin van een rerun: lege meetlijst in session_state (en eenmalig het HTTP-endpoint starten)
+def start_rerun():
+    st.session_state["rerun_metrics"] = {"started": time.perf_counter(), "calls": [], "http": []}
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+
+
+# Einde van een rerun: totale duur vastleggen en (indien ingesteld) het Prometheus-bestand bijwerken
+def finish_rerun():
+    state = st.session_state.get("rerun_metrics")
+    if not state:
+        return
+    state["seconds"] = time.perf_counter() - state["started"]
+    with _lock:
+        _reruns["count"] += 1
+        _reruns["seconds"] += state["seconds"]
+        _observe(_reruns["buckets"], state["seconds"])
+    if METRICS_FILE:
+        write_prometheus_file(METRICS_FILE)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def _histogram(lines, metric, buckets, count, total, **labels):
+    for bound, value in zip(LATENCY_BUCKETS, buckets):
+        lines.append(f"{metric}_bucket{_labels(**labels, le=bound)} {value}")
+    lines.append(f"{metric}_bucket{_labels(**labels, le='+Inf')} {count}")
+    lines.append(f"{metric}_sum{_labels(**labels) if labels else ''} {total:.6f}")
+    lines.append(f"{metric}_count{_labels(**labels) if labels else ''} {count}")
+
+
+# Alle procestellers in het tekstformaat van Prometheus
+def prometheus_text():
+    from http_cache import get_cache_stats
+
+    with _lock:
+        calls = {key: dict(entry, buckets=list(entry["buckets"])) for key, entry in _calls.items()}
+        http = {api: dict(entry) for api, entry in _http.items()}
+        reruns = dict(_reruns, buckets=list(_reruns["buckets"]))
+
+    lines = [f"# HELP {PREFIX}_call_seconds Duur van ophalingen en expanders.",
+             f"# TYPE {PREFIX}_call_seconds histogram"]
+    for (kind, name), entry in sorted(calls.items()):
+        _histogram(lines, f"{PREFIX}_call_seconds", entry["buckets"], entry["count"], entry["seconds"], kind=kind, name=name)
+    lines += [f"# HELP {PREFIX}_call_errors_total Mislukte ophalingen en expanders.",
+              f"# TYPE {PREFIX}_call_errors_total counter"]
+    lines += [f"{PREFIX}_call_errors_total{_labels(kind=kind, name=name)} {entry['errors']}"
+              for (kind, name), entry in sorted(calls.items())]
+    lines += [f"# HELP {PREFIX}_call_cache_total Oproepen per cache-uitkomst (memory, http-cache, network).",
+              f"# TYPE {PREFIX}_call_cache_total counter"]
+    lines += [f"{PREFIX}_call_cache_total{_labels(kind=kind, name=name, cache=outcome)} {entry[outcome]}"
+              for (kind, name), entry in sorted(calls.items()) for outcome in ("memory", "http-cache", "network")]
+
+    lines += [f"# HELP {PREFIX}_http_requests_total HTTP-aanvragen per API en cache-uitkomst.",
+              f"# TYPE {PREFIX}_http_requests_total counter"]
+    for api, entry in sorted(http.items()):
+        for outcome, key in (("hit", "hits"), ("miss", "misses"), ("error", "errors")):
+            lines.append(f"{PREFIX}_http_requests_total{_labels(api=api, cache=outcome)} {entry[key]}")
+    lines += [f"# HELP {PREFIX}_http_bytes_total Ontvangen bytes per API (ook uit de cache).",
+              f"# TYPE {PREFIX}_http_bytes_total counter"]
+    lines += [f"{PREFIX}_http_bytes_total{_labels(api=api)} {entry['bytes']}" for api, entry in sorted(http.items())]
+    lines += [f"# HELP {PREFIX}_http_seconds_total Totale duur van HTTP-aanvragen per API.",
+              f"# TYPE {PREFIX}_http_seconds_total counter"]
+    lines += [f"{PREFIX}_http_seconds_total{_labels(api=api)} {entry['seconds']:.6f}" for api, entry in sorted(http.items())]
+    lines += [f"# HELP {PREFIX}_http_cache_evictions_total Items verwijderd om de HTTP-cache klein te houden.",
+              f"# TYPE {PREFIX}_http_cache_evictions_total counter",
+              f"{PREFIX}_http_cache_evictions_total {get_cache_stats()['evictions']}"]
+
+    lines += [f"# HELP {PREFIX}_rerun_seconds Duur van volledige reruns.", f"# TYPE {PREFIX}_rerun_seconds histogram"]
+    _histogram(lines, f"{PREFIX}_rerun_seconds", reruns["buckets"], reruns["count"], reruns["seconds"])
+    return "\n".join(lines) + "\n"
+
+
+# Schrijf de tellers naar een bestand (atomair, zodat een collector nooit een half bestand leest)
+def write_prometheus_file(path):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(prometheus_text())
+    os.replace(temporary, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Eén /metrics-endpoint per proces, in een achtergrondthread
+@st.cache_resource
+def start_metrics_server(port):
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# Metingen van de huidige rerun, samengevat per oproep en per API
+def rerun_summary(state):
+    calls = pd.DataFrame(state["calls"], columns=["kind", "name", "ms", "error", "cache", "requests", "bytes"])
+    calls = calls.groupby(["kind", "name"], sort=False).agg(
+        calls=("ms", "size"), total_ms=("ms", "sum"), max_ms=("ms", "max"), errors=("error", "sum"),
+        cache=("cache", lambda values: ", ".join(sorted(set(values)))), requests=("requests", "sum"), bytes=("bytes", "sum"),
+    ).reset_index()
+    http = pd.DataFrame(state["http"], columns=["api", "cache", "bytes", "ms"])
+    http = http.pivot_table(index="api", columns="cache", values="ms", aggfunc="size", fill_value=0).join(
+        http.groupby("api").agg(bytes=("bytes", "sum"), total_ms=("ms", "sum"))
+    ).reset_index() if len(http) else http
+    return calls.round(1), http.round(1)
+
+
+# Toon de metingen van deze rerun in een debug-expander (enkel met ?debug=1 of WEATHER_APP_DEBUG=1)
+def show_metrics_expander():
+    if not (DEBUG or st.query_params.get("debug") not in (None, "", "0")):
+        return
+    state = st.session_state.get("rerun_metrics")
+    if not state:
+        return
+    from http_cache import get_cache_stats
+
+    calls, http = rerun_summary(state)
+    with st.expander("**Debug: metingen van deze rerun**", expanded=False):
+        st.caption(f"Rerun: {state.get('seconds', time.perf_counter() - state['started']) * 1000:.0f} ms")
+        st.dataframe(calls, hide_index=True)
+        st.dataframe(http, hide_index=True)
+        stats = get_cache_stats()
+        st.caption(
+            f"HTTP-cache sinds de start: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%}), {stats['evictions']} verwijderd"
+        )
+        with st.popover("Prometheus"):
+            st.code(prometheus_text(), language=None)
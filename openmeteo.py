@@ -0,0 +1,77 @@
+#openmeteo.py - binaire ingestie van Open-Meteo antwoorden (format=flatbuffers) via openmeteo-requests
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import openmeteo_requests
+from openmeteo_requests import OpenMeteoRequestsError
+
+from http_client import get_session
+
+# Variabelen die Open-Meteo als int64 (unix-tijd) teruggeeft in plaats van float32
+INT64_VARIABLES = ("sunrise", "sunset")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+# Gedeelde openmeteo-requests client bovenop de gedeelde (gecachete, gepoolde) HTTP-sessie
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openmeteo_requests.Client(session=get_session())
+    return _client
+
+
+# Zet een parameter ("a,b" of ["a", "b"]) om naar een lijst van variabelennamen
+def _variable_names(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [name.strip() for name in value if name.strip()]
+
+
+# Zet een hourly/daily-blok om naar NumPy-arrays met een integer tijdas (unix-seconden, UTC)
+def _section_to_arrays(section, names):
+    if section is None:
+        return {}
+    arrays = {"time": np.arange(section.Time(), section.TimeEnd(), section.Interval(), dtype=np.int64)}
+    for i, name in enumerate(names):
+        variable = section.Variables(i)
+        if name in INT64_VARIABLES:
+            arrays[name] = variable.ValuesInt64AsNumpy()
+        else:
+            arrays[name] = variable.ValuesAsNumpy()
+    return arrays
+
+
+# Haal één of meerdere locaties op als FlatBuffers en geef per locatie een dict met NumPy-arrays terug.
+# De structuur volgt het JSON-antwoord ("hourly"/"daily"), maar "time" bevat unix-seconden;
+# voor lokale tijd telt men er "utc_offset_seconds" bij op.
+def fetch_weather_arrays(url, params):
+    responses = get_client().weather_api(url, params=params)
+    hourly_names = _variable_names(params.get("hourly"))
+    daily_names = _variable_names(params.get("daily"))
+
+    results = []
+    for response in responses:
+        timezone_name = response.Timezone()
+        results.append({
+            "latitude": response.Latitude(),
+            "longitude": response.Longitude(),
+            "elevation": response.Elevation(),
+            "timezone": timezone_name.decode() if isinstance(timezone_name, bytes) else timezone_name,
+            "utc_offset_seconds": response.UtcOffsetSeconds(),
+            "hourly": _section_to_arrays(response.Hourly(), hourly_names),
+            "daily": _section_to_arrays(response.Daily(), daily_names),
+        })
+    return results
+
+
+# Zet één unix-tijdstip om naar een (naïeve) lokale datetime op basis van de UTC-offset
+def to_local_datetime(unix_seconds, utc_offset_seconds):
+    return datetime(1970, 1, 1) + timedelta(seconds=int(unix_seconds) + int(utc_offset_seconds))
+
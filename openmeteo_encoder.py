@@ -0,0 +1,83 @@
+#openmeteo_encoder.py - schrijft antwoorden in het FlatBuffers-formaat van Open-Meteo (format=flatbuffers), voor de stand-in server
+import re
+
+import flatbuffers
+import numpy as np
+from openmeteo_sdk.Variable import Variable
+
+# Slotnummers uit het schema van openmeteo_sdk (WeatherApiResponse, VariablesWithTime, VariableWithValues)
+_RESPONSE_SLOTS = {"latitude": 0, "longitude": 1, "elevation": 2, "location_id": 4, "utc_offset_seconds": 6,
+                   "timezone": 7, "timezone_abbreviation": 8, "daily": 10, "hourly": 11}
+_RESPONSE_FIELDS = 15
+_SECTION_FIELDS = 4
+_VARIABLE_FIELDS = 13
+_VARIABLE_SLOT, _ALTITUDE_SLOT, _VALUES_SLOT, _VALUES_INT64_SLOT = 0, 5, 3, 4
+
+
+# Splits een Open-Meteo variabelennaam in het enum-type en de hoogte, bv. "wind_speed_10m" -> (wind_speed, 10)
+def _variable_and_altitude(name):
+    match = re.fullmatch(r"(.+)_(\d+)m", name)
+    base, altitude = (match.group(1), int(match.group(2))) if match else (name, 0)
+    return getattr(Variable, base, getattr(Variable, name, Variable.undefined)), altitude
+
+
+# Schrijf een hourly/daily-blok: tijdas (start, einde, interval in seconden) en één vector per variabele
+def _section(builder, start, end, interval, variables):
+    offsets = []
+    for name, values in variables.items():
+        values = np.asarray(values)
+        is_int64 = values.dtype.kind in "iu"
+        vector = builder.CreateNumpyVector(values.astype(np.int64 if is_int64 else np.float32))
+        variable, altitude = _variable_and_altitude(name)
+        builder.StartObject(_VARIABLE_FIELDS)
+        builder.PrependUOffsetTRelativeSlot(_VALUES_INT64_SLOT if is_int64 else _VALUES_SLOT, vector, 0)
+        builder.PrependInt16Slot(_ALTITUDE_SLOT, altitude, 0)
+        builder.PrependUint8Slot(_VARIABLE_SLOT, variable, 0)
+        offsets.append(builder.EndObject())
+
+    builder.StartVector(4, len(offsets), 4)
+    for offset in reversed(offsets):
+        builder.PrependUOffsetTRelative(offset)
+    variables_vector = builder.EndVector()
+
+    builder.StartObject(_SECTION_FIELDS)
+    builder.PrependInt64Slot(0, int(start), 0)
+    builder.PrependInt64Slot(1, int(end), 0)
+    builder.PrependInt32Slot(2, int(interval), 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables_vector, 0)
+    return builder.EndObject()
+
+
+def encode_response(location):
+    """
+    Codeer één locatie als WeatherApiResponse, met de lengte-prefix (4 bytes, little-endian) die Open-Meteo
+    voor elke locatie meestuurt. location is een dict met latitude, longitude, elevation, utc_offset_seconds,
+    timezone, timezone_abbreviation, location_id en optioneel hourly/daily = (start, einde, interval, {naam: waarden}).
+    """
+    builder = flatbuffers.Builder(1024)
+    timezone = builder.CreateString(location.get("timezone", "GMT"))
+    abbreviation = builder.CreateString(location.get("timezone_abbreviation", "GMT"))
+    hourly = _section(builder, *location["hourly"]) if location.get("hourly") else None
+    daily = _section(builder, *location["daily"]) if location.get("daily") else None
+
+    builder.StartObject(_RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["latitude"], location["latitude"], 0)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["longitude"], location["longitude"], 0)
+    builder.PrependFloat32Slot(_RESPONSE_SLOTS["elevation"], location.get("elevation", 0.0), 0)
+    builder.PrependInt64Slot(_RESPONSE_SLOTS["location_id"], location.get("location_id", 0), 0)
+    builder.PrependInt32Slot(_RESPONSE_SLOTS["utc_offset_seconds"], location.get("utc_offset_seconds", 0), 0)
+    builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["timezone"], timezone, 0)
+    builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["timezone_abbreviation"], abbreviation, 0)
+    if daily is not None:
+        builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["daily"], daily, 0)
+    if hourly is not None:
+        builder.PrependUOffsetTRelativeSlot(_RESPONSE_SLOTS["hourly"], hourly, 0)
+    builder.Finish(builder.EndObject())
+
+    payload = bytes(builder.Output())
+    return len(payload).to_bytes(4, "little") + payload
+
+
+# Codeer meerdere locaties achter elkaar (zoals een antwoord met kommagescheiden coördinaten)
+def encode_responses(locations):
+    return b"".join(encode_response(location) for location in locations)
@@ -0,0 +1,78 @@
+#planner.py - bundelt de Open-Meteo aanvragen van alle weergaven: één aanvraag per locatie/endpoint/periode
+from gridcells import snap_for
+from hourlyframe import HourlyFrame
+from openmeteo import fetch_weather_arrays
+from singleflight import singleflight
+
+# Geregistreerde weergaven: naam -> (plan-sleutel, hourly-variabelen, daily-variabelen)
+_VIEWS = {}
+
+# Maximum aantal locaties per aanvraag (houdt de URL binnen de limieten van de API)
+BATCH_MAX_SITES = 100
+
+
+# Sleutel van een plan: weergaven met dezelfde URL en vaste parameters delen één aanvraag
+def _plan_key(url, params):
+    return url, tuple(sorted(params.items()))
+
+
+# Meld een weergave aan met de variabelen die ze nodig heeft; vaste parameters (bv. past_days) bepalen het plan
+def register_view(name, url, hourly=(), daily=(), **params):
+    _VIEWS[name] = (_plan_key(url, params), tuple(hourly), tuple(daily))
+
+
+# Unie van de variabelen van alle weergaven binnen hetzelfde plan (volgorde van registratie behouden)
+def planned_variables(plan_key):
+    hourly, daily = [], []
+    for key, view_hourly, view_daily in _VIEWS.values():
+        if key != plan_key:
+            continue
+        hourly += [name for name in view_hourly if name not in hourly]
+        daily += [name for name in view_daily if name not in daily]
+    return hourly, daily
+
+
+# Haal het volledige plan op voor een locatie (één aanvraag voor alle weergaven in het plan);
+# de coördinaten worden eerst op het modelrooster afgerond, zodat nabije locaties dezelfde aanvraag delen
+def fetch_plan(plan_key, latitude, longitude, **request_params):
+    return fetch_plan_batch(plan_key, [(latitude, longitude)], **request_params)[0]
+
+
+# Haal het plan op voor meerdere locaties tegelijk: Open-Meteo aanvaardt kommagescheiden lijsten van coördinaten
+# en geeft één antwoord per locatie terug. Locaties in dezelfde roostercel worden maar één keer gevraagd.
+# Geeft per locatie (in dezelfde volgorde) een HourlyFrame terug.
+def fetch_plan_batch(plan_key, sites, **request_params):
+    url, static_params = plan_key
+    hourly, daily = planned_variables(plan_key)
+    cells = [snap_for(url, latitude, longitude) for latitude, longitude in sites]
+    unique_cells = list(dict.fromkeys(cells))
+
+    frames = {}
+    for first in range(0, len(unique_cells), BATCH_MAX_SITES):
+        batch = unique_cells[first:first + BATCH_MAX_SITES]
+        params = {
+            "latitude": ",".join(str(latitude) for latitude, _ in batch),
+            "longitude": ",".join(str(longitude) for _, longitude in batch),
+            **dict(static_params),
+            **request_params,
+        }
+        if hourly:
+            params["hourly"] = hourly
+        if daily:
+            params["daily"] = daily
+
+        key = (url, tuple(sorted((name, str(value)) for name, value in params.items())))
+        results = singleflight(key, lambda: [HourlyFrame.from_arrays(data) for data in fetch_weather_arrays(url, params)])
+        frames.update(zip(batch, results))
+    return [frames[cell] for cell in cells]
+
+
+# Geef de gegevens voor één weergave terug: het gedeelde plan, geprojecteerd op de variabelen van de weergave
+def fetch_view(name, latitude, longitude, **request_params):
+    return fetch_view_batch(name, [(latitude, longitude)], **request_params)[0]
+
+
+# Zelfde als fetch_view, maar voor een lijst van (lat, lon) in één aanvraag; één frame per locatie
+def fetch_view_batch(name, sites, **request_params):
+    plan_key, hourly, _ = _VIEWS[name]
+    return [frame.select(*hourly) for frame in fetch_plan_batch(plan_key, sites, **request_params)]
@@ -0,0 +1,70 @@
+#prefetch.py - haalt alle externe gegevens die een rerun nodig heeft gelijktijdig op zodra lat/lon bekend zijn
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from lazy import is_open
+
+# Eén gedeelde threadpool voor het hele proces (alle sessies samen)
+_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="prefetch")
+
+# Register van alle ophaalfuncties die een rerun nodig heeft: naam -> functie(lat, lon, date)
+_FETCHERS = {}
+
+# Uitklapvak (zie lazy.py) per ophaalfunctie: enkel als dat vak open staat wordt vooraf opgehaald
+_SECTIONS = {}
+
+# Per ophaalfunctie: (uitzonderingen die als foutmelding getoond worden, begin van die melding)
+_ERRORS = {}
+
+
+# Decorator waarmee een module een ophaalfunctie aanmeldt bij de orchestrator (optioneel gekoppeld aan een uitklapvak);
+# de functie zelf toont geen fouten: uitzonderingen uit errors worden door get_prefetched op de scriptthread getoond
+def register_fetcher(name, section=None, errors=(), message="Fout bij het ophalen"):
+    def decorator(func):
+        _FETCHERS[name] = func
+        _SECTIONS[name] = section
+        _ERRORS[name] = (errors, message)
+        return func
+    return decorator
+
+
+# Voer een ophaalfunctie uit in een worker-thread met de ScriptRunContext van de sessie, zodat st.cache_data
+# ook vanuit de thread blijft werken (elementen zoals st.error horen niet in een worker: de rerun kan al voorbij zijn)
+def _run_with_ctx(ctx, func, *args):
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return func(*args)
+
+
+# Voer een losse ophaling uit op de gedeelde threadpool, met de ScriptRunContext van de huidige sessie
+def submit(func, *args):
+    return _EXECUTOR.submit(_run_with_ctx, get_script_run_ctx(), func, *args)
+
+
+# Start alle geregistreerde ophaalfuncties tegelijk voor deze locatie en datum
+# (gesloten uitklapvakken halen pas op wanneer ze geopend worden)
+def start_prefetch(lat, lon, date):
+    key = (lat, lon, date)
+    ctx = get_script_run_ctx()
+    st.session_state["prefetch"] = {
+        name: (key, _EXECUTOR.submit(_run_with_ctx, ctx, func, lat, lon, date))
+        for name, func in _FETCHERS.items()
+        if _SECTIONS[name] is None or is_open(_SECTIONS[name])
+    }
+
+
+# Geef het resultaat van een eerder gestarte ophaling terug; valt terug op een gewone (sequentiële)
+# oproep als er voor deze sleutel niets werd gestart (bv. wanneer een expander los gebruikt wordt).
+# Een aangemelde fout wordt hier, op de scriptthread, als st.error getoond en geeft None terug
+def get_prefetched(name, lat, lon, date):
+    errors, message = _ERRORS[name]
+    entry = st.session_state.get("prefetch", {}).get(name)
+    try:
+        if entry and entry[0] == (lat, lon, date):
+            return entry[1].result()
+        return _FETCHERS[name](lat, lon, date)
+    except errors as error:
+        st.error(f"{message}: {error}")
+        return None
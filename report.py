@@ -0,0 +1,294 @@
+#report.py - rapport zonder Streamlit-interface: weergegevens per telpost en per dag (binnen de civiele schemering)
+#voor een periode, als CSV, Parquet en/of HTML; de ophalingen lopen parallel over een procespool
+#Gebruik: python report.py telposten.txt --start 2024-08-01 --end 2024-10-31 [--format csv parquet html]
+#                          [--out reports] [--workers 4] [--hourly] [--country BE]
+#telposten.txt: één telpost per regel, "naam" (opgezocht) of "naam; lat; lon" (zoals in de telposten-expander)
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date as date_type, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Standaard aantal processen; elk proces doet één aanvraag tegelijk, dus dit begrenst ook de gelijktijdige
+# aanvragen naar Open-Meteo (hou het laag: de gratis API verwacht een redelijk gebruik)
+DEFAULT_WORKERS = 4
+FORMATS = ("csv", "parquet", "html")
+
+REPORT_STYLE = """<style>
+body { font-family: sans-serif; font-size: 13px; }
+table { border-collapse: collapse; margin-bottom: 24px; }
+th, td { border: 1px solid #ccc; padding: 2px 6px; text-align: right; }
+th { background: #eee; }
+</style>"""
+
+
+# Streamlit-meldingen zoals "No runtime found" zijn buiten de app zinloos
+def _quiet_streamlit():
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+
+
+# Lees de telposten: "naam; lat; lon" rechtstreeks, anders de offline plaatsnamenlijst en daarna Nominatim
+def resolve_sites(text, country_code=None):
+    from gazetteer import load_gazetteer
+    from invoer import nominatim_search
+
+    gazetteer = load_gazetteer()
+    sites, unknown = [], []
+    for line in text.splitlines():
+        parts = [part.strip() for part in line.split(";")]
+        if not parts[0]:
+            continue
+        if len(parts) >= 3:
+            try:
+                sites.append((parts[0], float(parts[1]), float(parts[2])))
+                continue
+            except ValueError:
+                pass
+        place = gazetteer.resolve(parts[0], country_code) or nominatim_search(parts[0], country_code)
+        if place is None:
+            unknown.append(parts[0])
+        else:
+            sites.append((parts[0], *place))
+    return sites, unknown
+
+
+# Vat een frame samen per dag, binnen het venster van civiele schemering (zoals de periodeweergave van de app);
+# geeft (dagtabel, uurtabel of None) terug voor de dagen van start tot en met end, in de lokale tijd van de telpost
+def summarize_days(name, lat, lon, frame, start, end, hourly=False):
+    from conversions import beaufort, compass, visibility_km
+    from data import twilight_windows
+    from invoer import sun_times_table
+    from timezones import timezone_name_at
+
+    # De historische delen komen in de tijdzone van de weergave (Europe/Berlin), de voorspelling in die van
+    # Open-Meteo (timezone=auto); datum, uren en zontijden volgen daarom de tijdzone van de telpost zelf
+    timezone = timezone_name_at(lat, lon) or frame.timezone
+    frame = frame.with_timezone(timezone)
+    window = frame.take(frame.daily_window_mask(*twilight_windows(frame)))
+    days = window.local_time.astype("datetime64[D]")
+    keep = (days >= np.datetime64(start, "D")) & (days <= np.datetime64(end, "D"))
+    window, days = window.take(keep), days[keep]
+
+    direction = np.radians(window["wind_direction_10m"])
+    table = pd.DataFrame({
+        "datum": days,
+        "temperature_2m": window["temperature_2m"],
+        "precipitation": window["precipitation"],
+        "cloud_cover": window["cloud_cover"],
+        "cloud_cover_low": window["cloud_cover_low"],
+        "visibility": window["visibility"],
+        "wind_speed_10m": window["wind_speed_10m"],
+        "wind_sin": np.sin(direction),
+        "wind_cos": np.cos(direction),
+    })
+    daily = table.groupby("datum").agg(
+        uren=("temperature_2m", "size"),
+        temp_min_c=("temperature_2m", "min"),
+        temp_max_c=("temperature_2m", "max"),
+        neerslag_mm=("precipitation", "sum"),
+        bewolking_pct=("cloud_cover", "mean"),
+        lage_bewolking_pct=("cloud_cover_low", "mean"),
+        zicht_min_m=("visibility", "min"),
+        wind_max_kmh=("wind_speed_10m", "max"),
+        wind_sin=("wind_sin", "mean"),
+        wind_cos=("wind_cos", "mean"),
+    ).reset_index()
+
+    # Omrekeningen in één keer voor alle dagen (zelfde functies als de expanders)
+    mean_direction = np.degrees(np.arctan2(daily.pop("wind_sin"), daily.pop("wind_cos"))) % 360
+    daily["windrichting"] = compass(mean_direction.to_numpy())
+    daily["wind_max_bf"] = beaufort(daily["wind_max_kmh"].to_numpy())
+    daily["zicht_min_km"] = visibility_km(daily.pop("zicht_min_m").to_numpy())
+    daily = daily.round({"temp_min_c": 1, "temp_max_c": 1, "neerslag_mm": 1, "bewolking_pct": 0,
+                         "lage_bewolking_pct": 0, "wind_max_kmh": 1})
+
+    # Zontijden per dag, met dezelfde berekening en tijdzone als het invoerformulier (invoer.get_sun_times)
+    sun_times = sun_times_table(lat, lon, daily["datum"].to_numpy(), timezone)
+    for column, event in (("zonsopkomst", "sunrise"), ("zonsondergang", "sunset"),
+                          ("schemering_begin", "civil_twilight_begin"), ("schemering_einde", "civil_twilight_end")):
+        daily[column] = sun_times[event]
+    daily.insert(0, "telpost", name)
+    daily.insert(1, "lat", round(lat, 4))
+    daily.insert(2, "lon", round(lon, 4))
+    daily.insert(3, "tijdzone", timezone)
+    daily["datum"] = daily["datum"].dt.date
+
+    hours = None
+    if hourly:
+        hours = pd.DataFrame({"telpost": name, "tijdzone": timezone, "tijd": window.local_time, **{
+            variable: np.round(window[variable], 2) for variable in window.variables
+        }})
+    return daily, hours
+
+
+# Taak in een werkproces: één telpost en één deel (kalendermaand) van de periode, uit het archief of Open-Meteo
+def historical_task(name, lat, lon, start, end, hourly):
+    from data import fetch_historical_chunk
+
+    frame = fetch_historical_chunk(lat, lon, start, end)
+    if frame is None or not len(frame):
+        return None, None
+    return summarize_days(name, lat, lon, frame, start, end, hourly)
+
+
+# Taak in een werkproces: de voorspelling voor alle telposten tegelijk (één aanvraag per 100 locaties)
+def forecast_task(sites, start, end, hourly):
+    import forecast2  # meldt de weergave "forecast2" aan bij de planner
+    from planner import fetch_view_batch
+
+    frames = fetch_view_batch("forecast2", [(lat, lon) for _, lat, lon in sites])
+    results = [summarize_days(name, lat, lon, frame, start, end, hourly) for (name, lat, lon), frame in zip(sites, frames)]
+    dailies = [daily for daily, _ in results]
+    hours = [hours for _, hours in results if hours is not None]
+    return pd.concat(dailies, ignore_index=True), pd.concat(hours, ignore_index=True) if hours else None
+
+
+# Verdeel de periode: verleden dagen per telpost en per maand uit het archief, vanaf vandaag uit de voorspelling
+def plan_tasks(sites, start, end, hourly, today=None):
+    from data import split_date_range
+    from forecast2 import FORECAST_RANGE
+
+    today = today or date_type.today()
+    tasks = []
+    historical_end = min(end, today - timedelta(days=1))
+    if start <= historical_end:
+        for chunk_start, chunk_end in split_date_range(start, historical_end):
+            for name, lat, lon in sites:
+                tasks.append((f"{name} {chunk_start} - {chunk_end}", historical_task,
+                              (name, lat, lon, chunk_start, chunk_end, hourly)))
+    forecast_start = max(start, today)
+    forecast_end = min(end, today + timedelta(days=FORECAST_RANGE["forecast_days"] - 1))
+    if forecast_start <= forecast_end:
+        tasks.append((f"voorspelling {forecast_start} - {forecast_end}", forecast_task,
+                      (sites, forecast_start, forecast_end, hourly)))
+    return tasks
+
+
+# Voer alle taken uit over een procespool; geeft (dagtabel, uurtabel, fouten) terug
+def run_report(sites, start, end, workers=DEFAULT_WORKERS, hourly=False, progress=print):
+    tasks = plan_tasks(sites, start, end, hourly)
+    dailies, hours, errors = [], [], []
+    # "spawn": elk werkproces opent zijn eigen HTTP-sessie en SQLite-verbinding (niet gedeeld via fork)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_quiet_streamlit) as executor:
+        futures = {executor.submit(func, *args): label for label, func, args in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            label = futures[future]
+            try:
+                daily, hourly_rows = future.result()
+            except Exception as error:  # een mislukte taak stopt de rest van het rapport niet
+                errors.append(f"{label}: {error}")
+                progress(f"[{done}/{len(tasks)}] {label}: FOUT {error}")
+                continue
+            if daily is not None:
+                dailies.append(daily)
+            if hourly_rows is not None:
+                hours.append(hourly_rows)
+            progress(f"[{done}/{len(tasks)}] {label}")
+
+    order = {name: index for index, (name, _, _) in enumerate(sites)}
+    daily = pd.concat(dailies, ignore_index=True) if dailies else pd.DataFrame()
+    if len(daily):
+        daily = daily.sort_values(["telpost", "datum"], key=lambda column: column.map(order) if column.name == "telpost" else column)
+        daily = daily.reset_index(drop=True)
+    hourly_table = pd.concat(hours, ignore_index=True).sort_values(["telpost", "tijd"], ignore_index=True) if hours else None
+    return daily, hourly_table, errors
+
+
+# Dagen uit [start, end] zonder rij in de dagtabel, per telpost (mislukte taak, poolnacht, geen gegevens),
+# als aaneengesloten reeksen (eerste, laatste); telposten zonder ontbrekende dagen komen niet voor
+def missing_days(daily, sites, start, end):
+    present = daily.groupby("telpost")["datum"].agg(set).to_dict() if len(daily) else {}
+    missing = {}
+    for name, _, _ in sites:
+        ranges = []
+        for day in pd.date_range(start, end).date:
+            if day in present.get(name, ()):
+                continue
+            if ranges and ranges[-1][1] == day - timedelta(days=1):
+                ranges[-1] = (ranges[-1][0], day)
+            else:
+                ranges.append((day, day))
+        if ranges:
+            missing[name] = ranges
+    return missing
+
+
+# Schrijf een tabel in de gevraagde formaten; geeft de geschreven paden terug
+def write_table(table, path_stem, formats, title):
+    paths = []
+    if "csv" in formats:
+        table.to_csv(f"{path_stem}.csv", index=False)
+        paths.append(f"{path_stem}.csv")
+    if "parquet" in formats:
+        table.to_parquet(f"{path_stem}.parquet", index=False)
+        paths.append(f"{path_stem}.parquet")
+    if "html" in formats:
+        sections = [f"<h1>{title}</h1>"]
+        for name, rows in (table.groupby("telpost", sort=False) if "telpost" in table else [("", table)]):
+            sections.append(f"<h2>{name}</h2>" + rows.to_html(index=False, na_rep=""))
+        with open(f"{path_stem}.html", "w", encoding="utf-8") as handle:
+            handle.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title>"
+                         f"{REPORT_STYLE}</head><body>{''.join(sections)}</body></html>")
+        paths.append(f"{path_stem}.html")
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weerrapport per telpost en per dag (zonder Streamlit).")
+    parser.add_argument("sites", help="bestand met telposten (één per regel: 'naam' of 'naam; lat; lon'), of - voor stdin")
+    parser.add_argument("--start", required=True, type=date_type.fromisoformat, help="eerste dag (JJJJ-MM-DD)")
+    parser.add_argument("--end", required=True, type=date_type.fromisoformat, help="laatste dag (JJJJ-MM-DD)")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["csv"], dest="formats")
+    parser.add_argument("--out", default="reports", help="uitvoermap")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="aantal processen (= gelijktijdige aanvragen)")
+    parser.add_argument("--hourly", action="store_true", help="ook een tabel met alle uren binnen de schemering")
+    parser.add_argument("--country", help="landcode (ISO2) voor het opzoeken van plaatsnamen, bv. BE")
+    args = parser.parse_args(argv)
+    if args.start > args.end:
+        parser.error("--start ligt na --end")
+
+    _quiet_streamlit()
+    text = sys.stdin.read() if args.sites == "-" else open(args.sites, encoding="utf-8").read()
+    sites, unknown = resolve_sites(text, args.country and args.country.upper())
+    if unknown:
+        print(f"Niet gevonden: {', '.join(unknown)}", file=sys.stderr)
+    if not sites:
+        print("Geen telposten.", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    daily, hourly, errors = run_report(sites, args.start, args.end, args.workers, args.hourly,
+                                       progress=lambda line: print(line, file=sys.stderr))
+
+    os.makedirs(args.out, exist_ok=True)
+    stem = os.path.join(args.out, f"rapport_{args.start}_{args.end}")
+    title = f"Weerrapport {args.start} - {args.end} ({len(sites)} telposten)"
+    paths = write_table(daily, stem, args.formats, title) if len(daily) else []
+    if hourly is not None:
+        paths += write_table(hourly, f"{stem}_uren", args.formats, f"{title}, per uur")
+
+    missing = missing_days(daily, sites, args.start, args.end)
+    for name, ranges in missing.items():
+        days = sum((last - first).days + 1 for first, last in ranges)
+        spans = ", ".join(str(first) if first == last else f"{first} - {last}" for first, last in ranges)
+        print(f"Ontbrekend voor {name}: {days} dagen ({spans})", file=sys.stderr)
+    expected = len(sites) * ((args.end - args.start).days + 1)
+    print(f"{len(daily)} van {expected} dagen voor {len(sites)} telposten in {time.perf_counter() - started:.1f} s"
+          + (f" ({expected - len(daily)} ontbrekend)" if missing else ""), file=sys.stderr)
+    for path in paths:
+        print(path)
+    for error in errors:
+        print(f"Fout: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
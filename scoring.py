@@ -0,0 +1,134 @@
+#scoring.py - geschiktheid voor zichtbare trek per (telpost, uur), volledig gevectoriseerd over een matrix van locaties x uren
+import numpy as np
+
+from conversions import beaufort, visibility_km
+from solar import sun_events
+
+# Instelbare parameters van de score; elk onderdeel geeft een waarde tussen 0 (slecht) en 1 (goed)
+DEFAULT_SCORING = {
+    "migration_axis": 225.0,  # richting (graden) waarin de vogels trekken; najaarstrek langs de kust: ZW
+    "wind_preference": "headwind",  # "headwind": tegenwind houdt trekkers laag en zichtbaar, "tailwind": meer trek
+    "beaufort_band": (1, 4),  # ideale windkracht (Beaufort, inclusief)
+    "beaufort_penalty": 0.25,  # scoreverlies per Beaufort buiten de band
+    "good_visibility_km": 10.0,  # vanaf deze zichtbaarheid telt zicht als volledig goed
+    "rain_limit_mm": 1.0,  # vanaf deze neerslag per uur is de regenscore 0
+    "weights": {"wind": 2.0, "beaufort": 2.0, "low_cloud": 1.0, "visibility": 1.0, "rain": 2.0},
+    "daylight_only": True,  # enkel uren tussen civiele schemering ochtend en avond
+}
+
+# Variabelen die de score nodig heeft (aanwezig in de voorspelling en de historische gegevens)
+SCORING_VARIABLES = ("wind_direction_10m", "wind_speed_10m", "cloud_cover_low", "visibility", "precipitation")
+
+
+# Zet de frames van meerdere telposten om naar (telpost, uur)-matrices op een gemeenschappelijke UTC-tijdas;
+# frames uit één batch-aanvraag delen dezelfde tijdas, anders wordt de doorsnede genomen
+def stack_sites(frames, variables=SCORING_VARIABLES):
+    time = frames[0].time
+    for frame in frames[1:]:
+        if len(frame.time) != len(time) or not np.array_equal(frame.time, time):
+            time = np.intersect1d(time, frame.time)
+    matrices = {}
+    for name in variables:
+        rows = []
+        for frame in frames:
+            index = slice(None) if np.array_equal(frame.time, time) else np.searchsorted(frame.time, time)
+            rows.append(np.asarray(frame[name], dtype=np.float64)[index])
+        matrices[name] = np.vstack(rows)
+    return time, matrices
+
+
+# Masker (telpost, uur) voor de uren tussen civiele schemering ochtend en avond, voor alle telposten en dagen tegelijk
+def daylight_mask(time, latitudes, longitudes):
+    hour_days = time.astype("datetime64[D]")
+    days = np.unique(hour_days)
+    events = sun_events(days[np.newaxis, :], np.asarray(latitudes)[:, np.newaxis], np.asarray(longitudes)[:, np.newaxis],
+                        events=("civil_twilight_begin", "civil_twilight_end"))
+    day_index = np.searchsorted(days, hour_days)
+    begin = events["civil_twilight_begin"][:, day_index]
+    end = events["civil_twilight_end"][:, day_index]
+    return (time[np.newaxis, :] >= begin) & (time[np.newaxis, :] <= end)
+
+
+def score_matrix(matrices, migration_axis=None, config=None):
+    """
+    Bereken de trekscore voor elke (telpost, uur) uit de matrices van stack_sites.
+    migration_axis mag één waarde of één waarde per telpost zijn. Geeft (score, onderdelen) terug:
+    score is een (telpost, uur)-matrix tussen 0 en 1 (NaN bij ontbrekende gegevens), onderdelen een dict met
+    per onderdeel een matrix van dezelfde vorm.
+    """
+    config = {**DEFAULT_SCORING, **(config or {})}
+    axis = config["migration_axis"] if migration_axis is None else migration_axis
+    axis = np.asarray(axis, dtype=np.float64).reshape(-1, 1)  # broadcast over de uren
+
+    # Wind uit de trekrichting = tegenwind (cos = 1), wind in de rug = cos -1
+    alignment = np.cos(np.radians(matrices["wind_direction_10m"] - axis))
+    sign = 1.0 if config["wind_preference"] == "headwind" else -1.0
+
+    low, high = config["beaufort_band"]
+    force = beaufort(matrices["wind_speed_10m"]).astype(np.float64)
+    force[np.isnan(matrices["wind_speed_10m"])] = np.nan
+    outside = np.maximum(low - force, 0) + np.maximum(force - high, 0)
+
+    components = {
+        "wind": (1.0 + sign * alignment) / 2.0,
+        "beaufort": np.clip(1.0 - config["beaufort_penalty"] * outside, 0.0, 1.0),
+        "low_cloud": 1.0 - np.clip(matrices["cloud_cover_low"] / 100.0, 0.0, 1.0),
+        "visibility": np.clip(visibility_km(matrices["visibility"]) / config["good_visibility_km"], 0.0, 1.0),
+        "rain": 1.0 - np.clip(matrices["precipitation"] / config["rain_limit_mm"], 0.0, 1.0),
+    }
+
+    weights = config["weights"]
+    total_weight = sum(weights.get(name, 0.0) for name in components)
+    score = sum(weights.get(name, 0.0) * values for name, values in components.items()) / total_weight
+    return score, components
+
+
+# Beste vensters van window_hours opeenvolgende uren over alle telposten: lijst van (telpost, eerste uur, score),
+# hoogste score eerst; vensters van dezelfde telpost overlappen niet, vensters met een ongeldig uur vallen weg
+def top_windows(score, k=10, window_hours=3, valid=None):
+    if valid is not None:
+        score = np.where(valid, score, np.nan)
+    sites, hours = score.shape
+    if hours < window_hours:
+        return []
+    invalid = np.isnan(score)
+    filled = np.where(invalid, 0.0, score)
+
+    # Voortschrijdend gemiddelde via cumulatieve sommen (telpost, venster)
+    zero = np.zeros((sites, 1))
+    sums = np.cumsum(np.hstack([zero, filled]), axis=1)
+    bad = np.cumsum(np.hstack([zero, invalid.astype(np.float64)]), axis=1)
+    means = (sums[:, window_hours:] - sums[:, :-window_hours]) / window_hours
+    means[(bad[:, window_hours:] - bad[:, :-window_hours]) > 0] = -np.inf
+
+    order = np.argsort(means, axis=None)[::-1]
+    chosen, taken = [], np.zeros(means.shape, dtype=bool)
+    for flat in order:
+        site, start = divmod(int(flat), means.shape[1])
+        if means[site, start] == -np.inf:
+            break
+        if taken[site, max(0, start - window_hours + 1):start + window_hours].any():
+            continue
+        taken[site, start] = True
+        chosen.append((site, start, float(means[site, start])))
+        if len(chosen) == k:
+            break
+    return chosen
+
+
+# Alles in één: frames van telposten -> beste vensters met begin- en eindtijd (UTC)
+def best_windows(frames, latitudes, longitudes, k=10, window_hours=3, migration_axis=None, config=None):
+    config = {**DEFAULT_SCORING, **(config or {})}
+    time, matrices = stack_sites(frames)
+    score, components = score_matrix(matrices, migration_axis, config)
+    valid = daylight_mask(time, latitudes, longitudes) if config["daylight_only"] else None
+    return [
+        {
+            "site": site,
+            "start": time[start],
+            "end": time[start + window_hours - 1],
+            "score": value,
+            **{name: float(np.nanmean(values[site, start:start + window_hours])) for name, values in components.items()},
+        }
+        for site, start, value in top_windows(score, k, window_hours, valid)
+    ]
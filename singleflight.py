@@ -0,0 +1,27 @@
+#singleflight.py - gelijktijdige oproepen met dezelfde sleutel delen één uitvoering (zonder afhankelijkheden,
+#zodat ook tile_proxy.py het kan gebruiken zonder de rest van de app te laden)
+import threading
+from concurrent.futures import Future
+
+# Oproepen die op dit moment lopen (gedeeld over alle threads): sleutel -> Future
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+# Voer func één keer uit per sleutel; gelijktijdige oproepen met dezelfde sleutel wachten op hetzelfde resultaat
+def singleflight(key, func):
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+    if leader:
+        try:
+            future.set_result(func())
+        except BaseException as err:
+            future.set_exception(err)
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+    return future.result()
@@ -0,0 +1,137 @@
+#sites.py - meerdere telposten tegelijk: alle locaties in één Open-Meteo aanvraag, opgesplitst per locatie
+from datetime import date as date_type, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from conversions import beaufort, compass, visibility_km
+from data import fetch_historical_sites
+from forecast2 import FORECAST_RANGE, fetch_forecast_sites
+from invoer import get_gps_coordinates
+from metrics import instrument
+from lazy import LAZY_PLACEHOLDER, lazy_expander
+from scoring import DEFAULT_SCORING, best_windows
+
+SITES_HELP = "Eén telpost per regel: 'naam' of 'naam; lat; lon'"
+
+
+# Functie om de lijst van telposten te lezen: elke regel is "naam" (opgezocht) of "naam; lat; lon"
+def parse_sites(text, country_code=None):
+    sites, unknown = [], []
+    for line in text.splitlines():
+        parts = [part.strip() for part in line.split(";")]
+        if not parts[0]:
+            continue
+        if len(parts) >= 3:
+            try:
+                sites.append((parts[0], float(parts[1]), float(parts[2])))
+                continue
+            except ValueError:
+                pass
+        lat, lon = get_gps_coordinates(parts[0], country_code)
+        if lat is None or lon is None:
+            unknown.append(parts[0])
+        else:
+            sites.append((parts[0], lat, lon))
+    return sites, unknown
+
+
+# Functie om per telpost de uren van de gekozen dag en het gekozen venster samen te vatten (één rij per telpost)
+def summarize_sites(names, frames, date, start_hour, end_hour, language="Nederlands"):
+    rows = []
+    for name, frame in zip(names, frames):
+        window = frame.take(frame.time_of_day_mask(start_hour, end_hour))
+        window = window.between(np.datetime64(date, "s"), np.datetime64(date + timedelta(days=1), "s") - 1)
+        if not len(window):
+            rows.append({"Telpost": name})
+            continue
+        direction = np.radians(window["wind_direction_10m"])
+        mean_direction = np.degrees(np.arctan2(np.nanmean(np.sin(direction)), np.nanmean(np.cos(direction)))) % 360
+        rows.append({
+            "Telpost": name,
+            "🌡️ min (°C)": round(float(np.nanmin(window["temperature_2m"])), 1),
+            "🌡️ max (°C)": round(float(np.nanmax(window["temperature_2m"])), 1),
+            "🌧️ (mm)": round(float(np.nansum(window["precipitation"])), 1),
+            "☁️ (%)": round(float(np.nanmean(window["cloud_cover"]))),
+            "👁️ min (km)": float(visibility_km(np.nanmin(window["visibility"]))),
+            "💨 max (Bf)": int(beaufort(np.nanmax(window["wind_speed_10m"]))),
+            "🧭": str(compass(mean_direction, language)),
+        })
+    return pd.DataFrame(rows)
+
+
+# Functie om de beste trekvensters over alle telposten te tonen (lokale tijd van elke telpost)
+def show_best_windows(sites, frames):
+    st.markdown("**Beste uren voor zichtbare trek / Best hours for visible migration**")
+    col_axis, col_wind, col_k = st.columns(3)
+    axis = col_axis.number_input("Trekrichting (°)", 0, 359, int(DEFAULT_SCORING["migration_axis"]), step=15)
+    preference = col_wind.radio("Wind", ("headwind", "tailwind"), format_func={"headwind": "Tegenwind", "tailwind": "Meewind"}.get)
+    k = col_k.slider("Aantal vensters", 1, 30, 10)
+
+    windows = best_windows(
+        frames, [lat for _, lat, _ in sites], [lon for _, _, lon in sites],
+        k=k, migration_axis=axis, config={"wind_preference": preference},
+    )
+    if not windows:
+        st.write("Geen geschikte uren gevonden.")
+        return
+    rows = []
+    for window in windows:
+        timezone = frames[window["site"]].timezone or "UTC"
+        start, end = pd.DatetimeIndex([window["start"], window["end"]]).tz_localize("UTC").tz_convert(timezone)
+        rows.append({
+            "Telpost": sites[window["site"]][0],
+            "Van": start.strftime("%Y-%m-%d %H:%M"),
+            "Tot": (end + timedelta(hours=1)).strftime("%H:%M"),
+            "Score": round(100 * window["score"]),
+            **{name: round(100 * window[name]) for name in DEFAULT_SCORING["weights"]},
+        })
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+# Functie om de telposten-expander te tonen
+@instrument("expander")
+def show_sites_expander():
+    language = st.session_state.get("language", "Nederlands")
+    date = st.session_state.get("selected_date")
+    start_hour = st.session_state.get("start_hour")
+    end_hour = st.session_state.get("end_hour")
+    location = st.session_state.get("location")
+    if not (date and start_hour and end_hour and location):
+        return
+    sites_expander_fragment(location, st.session_state.get("latitude"), st.session_state.get("longitude"),
+                            date, start_hour, end_hour, language)
+
+# Telposten als fragment met expliciete invoer: de lijst aanpassen voert enkel deze expander opnieuw uit
+@st.fragment
+@instrument("fragment")
+def sites_expander_fragment(location, latitude, longitude, date, start_hour, end_hour, language):
+    with lazy_expander("sites", "**Telposten / Count sites**") as expander:
+        if not expander.open:
+            st.caption(LAZY_PLACEHOLDER)
+            return
+        default_sites = st.session_state.get("sites_text", f"{location}; {latitude:.4f}; {longitude:.4f}")
+        sites_text = st.text_area("Telposten", value=default_sites, help=SITES_HELP, height=150)
+        st.session_state["sites_text"] = sites_text
+
+        country_code = st.session_state.get("country_code")
+        sites, unknown = parse_sites(sites_text, country_code)
+        if unknown:
+            st.warning(f"Niet gevonden: {', '.join(unknown)}")
+        if not sites:
+            return
+        st.session_state["sites"] = sites
+
+        # Eén aanvraag voor alle telposten: de voorspelling als de dag erin valt, anders de historische gegevens
+        coordinates = [(lat, lon) for _, lat, lon in sites]
+        today = date_type.today()
+        in_forecast = today - timedelta(days=FORECAST_RANGE["past_days"]) <= date < today + timedelta(days=FORECAST_RANGE["forecast_days"])
+        frames = fetch_forecast_sites(coordinates) if in_forecast else fetch_historical_sites(coordinates, date)
+        if frames is None:
+            return
+
+        st.write(f"{date}, {start_hour} - {end_hour} ({len(sites)} telposten)")
+        st.dataframe(summarize_sites([name for name, _, _ in sites], frames, date, start_hour, end_hour, language),
+                     hide_index=True)
+
+        show_best_windows(sites, frames)
@@ -0,0 +1,120 @@
+#solar.py - lokale berekening van zonsopkomst, zonsondergang en schemering (NOAA-algoritme), gevectoriseerd
+import numpy as np
+import pandas as pd
+
+# Zenithoeken (graden) per gebeurtenis: gewone zonsopkomst houdt rekening met refractie en de zonneschijf
+ZENITHS = {
+    "sunrise": 90.833,
+    "civil_twilight": 96.0,
+    "nautical_twilight": 102.0,
+}
+
+# Namen zoals gebruikt door api.sunrise-sunset.org (en elders in de app): (zenith, ochtend?)
+EVENTS = {
+    "sunrise": ("sunrise", True),
+    "sunset": ("sunrise", False),
+    "civil_twilight_begin": ("civil_twilight", True),
+    "civil_twilight_end": ("civil_twilight", False),
+    "nautical_twilight_begin": ("nautical_twilight", True),
+    "nautical_twilight_end": ("nautical_twilight", False),
+}
+
+_UNIX_EPOCH_JD = 2440587.5  # Juliaanse dag van 1970-01-01T00:00 UTC
+_ITERATIONS = 4  # verfijningsstappen; nodig bij scherende schemering op hoge breedte
+
+
+# Declinatie van de zon (graden) en tijdsvereffening (minuten) op de gegeven tijdstippen (Juliaanse dag)
+def _solar_declination_and_eot(julian_day):
+    t = (julian_day - 2451545.0) / 36525.0  # Juliaanse eeuwen sinds J2000
+
+    mean_long = np.mod(280.46646 + t * (36000.76983 + t * 0.0003032), 360.0)
+    mean_anom = 357.52911 + t * (35999.05029 - 0.0001537 * t)
+    eccent = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    m = np.radians(mean_anom)
+    center = (
+        np.sin(m) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + np.sin(2 * m) * (0.019993 - 0.000101 * t)
+        + np.sin(3 * m) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * t)
+    app_long = mean_long + center - 0.00569 - 0.00478 * np.sin(omega)
+
+    mean_obliq = 23.0 + (26.0 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0) / 60.0
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.degrees(np.arcsin(np.sin(obliq) * np.sin(np.radians(app_long))))
+
+    y = np.tan(obliq / 2) ** 2
+    l0 = np.radians(mean_long)
+    eq_of_time = 4 * np.degrees(
+        y * np.sin(2 * l0)
+        - 2 * eccent * np.sin(m)
+        + 4 * eccent * y * np.sin(m) * np.cos(2 * l0)
+        - 0.5 * y * y * np.sin(4 * l0)
+        - 1.25 * eccent * eccent * np.sin(2 * m)
+    )
+    return declination, eq_of_time
+
+
+# Uurhoek (graden) van de zon bij de gegeven zenith; NaN als de zon die hoek die dag niet bereikt
+def _hour_angle(latitude, declination, zenith):
+    lat = np.radians(latitude)
+    dec = np.radians(declination)
+    cos_ha = np.cos(np.radians(zenith)) / (np.cos(lat) * np.cos(dec)) - np.tan(lat) * np.tan(dec)
+    with np.errstate(invalid="ignore"):
+        return np.degrees(np.arccos(np.where(np.abs(cos_ha) <= 1, cos_ha, np.nan)))
+
+
+# Tijdstip (minuten na middernacht UTC) van één gebeurtenis, telkens verfijnd met de zonnestand op het geschatte tijdstip
+def _event_minutes(day_jd, latitude, longitude, zenith, morning):
+    sign = -1.0 if morning else 1.0
+    minutes = 720.0 - 4.0 * longitude  # eerste schatting: plaatselijke middag
+    for _ in range(_ITERATIONS):
+        declination, eq_of_time = _solar_declination_and_eot(day_jd + minutes / 1440.0)
+        minutes = 720.0 - 4.0 * (longitude - sign * _hour_angle(latitude, declination, zenith)) - eq_of_time
+    return minutes
+
+
+def sun_events(dates, latitudes, longitudes, events=tuple(EVENTS)):
+    """
+    Bereken zonsopkomst/-ondergang en schemeringstijden voor arrays van datums en locaties in één oproep.
+    dates, latitudes en longitudes worden gebroadcast (bv. datums als kolom en locaties als rij).
+    Geeft per gebeurtenis een datetime64[s]-array in UTC terug; NaT als de gebeurtenis niet plaatsvindt
+    (poolnacht of middernachtzon).
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    dates, latitudes, longitudes = np.broadcast_arrays(dates, latitudes, longitudes)
+
+    day_jd = dates.astype(np.int64) + _UNIX_EPOCH_JD
+    midnight = dates.astype("datetime64[s]")
+
+    results = {}
+    for name in events:
+        zenith_name, morning = EVENTS[name]
+        minutes = _event_minutes(day_jd, latitudes, longitudes, ZENITHS[zenith_name], morning)
+        seconds = np.round(np.nan_to_num(minutes * 60.0)).astype(np.int64)
+        results[name] = np.where(np.isnan(minutes), np.datetime64("NaT"), midnight + seconds.astype("timedelta64[s]"))
+    return results
+
+
+# Hoogte van de zon (graden) op de plaatselijke middag; bij een NaT in sun_events onderscheidt dit een zon die
+# de hele dag boven de hoek blijft (middernachtzon, witte nachten) van een zon die er nooit boven komt (poolnacht)
+def noon_elevation(dates, latitudes, longitudes):
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    day_jd = dates.astype(np.int64) + _UNIX_EPOCH_JD
+    declination, _ = _solar_declination_and_eot(day_jd + (720.0 - 4.0 * longitudes) / 1440.0)
+    return 90.0 - np.abs(latitudes - declination)
+
+
+# Zelfde gebeurtenissen, maar als naïeve lokale tijd in de opgegeven tijdzone (bv. voor een daglichttabel per seizoen)
+def local_sun_events(dates, latitude, longitude, timezone):
+    local_events = {}
+    for name, values in sun_events(dates, latitude, longitude).items():
+        local = pd.DatetimeIndex(values.ravel()).tz_localize("UTC").tz_convert(timezone).tz_localize(None)
+        local_events[name] = local.to_numpy().astype("datetime64[s]").reshape(values.shape)
+    return local_events
@@ -0,0 +1,350 @@
+#standin_server.py - lokale vervanger van Open-Meteo, Nominatim en sunrise-sunset: opgenomen antwoorden afspelen
+#of realistische synthetische antwoorden maken, met instelbare vertraging en fouten (voor offline testen en load tests)
+#Gebruik: python standin_server.py [--port 8765] [--fixtures benchmarks/fixtures] [--latency-ms 150] [--error-rate 0.05]
+#en start de app met WEATHER_APP_STANDIN=http://127.0.0.1:8765 (zie endpoints.py)
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import zoneinfo
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from openmeteo_encoder import encode_responses
+from solar import sun_events
+
+# Prefixen op deze server -> publieke basis-URL (dezelfde indeling als endpoints.py)
+PREFIXES = {
+    "/forecast": "https://api.open-meteo.com",
+    "/historical": "https://historical-forecast-api.open-meteo.com",
+    "/nominatim": "https://nominatim.openstreetmap.org",
+    "/sunrise-sunset": "https://api.sunrise-sunset.org",
+}
+DEFAULT_FORECAST_DAYS = 7
+MAX_DAYS = 366 * 5  # langere periodes weigert de server, zoals de echte API
+
+_timezone_finder = None
+_timezone_lock = threading.Lock()
+
+
+# Tijdzone voor timezone=auto (TimezoneFinder pas laden als het nodig is)
+def _auto_timezone(lat, lon):
+    global _timezone_finder
+    with _timezone_lock:
+        if _timezone_finder is None:
+            from timezonefinder import TimezoneFinder
+            _timezone_finder = TimezoneFinder()
+        return _timezone_finder.timezone_at(lat=lat, lng=lon) or "GMT"
+
+
+# Vaste fase per locatie, zodat dezelfde locatie altijd hetzelfde weer krijgt
+def _phase(lat, lon, salt):
+    digest = hashlib.sha1(f"{lat:.2f},{lon:.2f},{salt}".encode()).digest()
+    return int.from_bytes(digest[:4], "little") / 2**32 * 2 * np.pi
+
+
+# Synthetische, maar aannemelijke waarden voor één variabele op unix-tijdstippen (seconden)
+def synthetic_values(name, unix_seconds, lat, lon):
+    hours = unix_seconds / 3600.0
+    day_of_year = (unix_seconds / 86400.0) % 365.25
+    local_hour = (hours + lon / 15.0) % 24
+
+    def wave(period_hours, salt):
+        return np.sin(2 * np.pi * hours / period_hours + _phase(lat, lon, salt))
+
+    if name.startswith("temperature") or name.startswith("apparent_temperature") or name.startswith("dew_point"):
+        seasonal = 8.0 * np.cos(2 * np.pi * (day_of_year - 200) / 365.25)
+        diurnal = 5.0 * np.cos(2 * np.pi * (local_hour - 15) / 24)
+        values = 14.0 - 0.6 * (lat - 45.0) + seasonal + diurnal + 2.0 * wave(71, "t")
+        return values - (3.0 if name.startswith("dew_point") else 0.0)
+    if name.startswith("wind_speed") or name.startswith("wind_gusts"):
+        match = re.search(r"_(\d+)m$", name)
+        height = float(match.group(1)) if match else 10.0
+        factor = (height / 10.0) ** 0.14 * (1.5 if name.startswith("wind_gusts") else 1.0)
+        return np.clip(14.0 + 9.0 * wave(53, "w") + 4.0 * wave(7, "w2"), 0.0, None) * factor
+    if name.startswith("wind_direction"):
+        return (225.0 + 70.0 * wave(97, "d") + 25.0 * wave(9, "d2")) % 360.0
+    if name.startswith("cloud_cover"):
+        return np.clip(50.0 + 45.0 * wave(23, name) + 15.0 * wave(5, name + "2"), 0.0, 100.0)
+    if name in ("precipitation", "rain", "showers"):
+        return np.round(np.clip(2.5 * wave(31, "p") + 1.0 * wave(4, "p2") - 1.8, 0.0, None), 1)
+    if name == "visibility":
+        cloud_low = synthetic_values("cloud_cover_low", unix_seconds, lat, lon)
+        rain = synthetic_values("precipitation", unix_seconds, lat, lon)
+        return np.clip(40000.0 - 250.0 * cloud_low - 9000.0 * rain, 200.0, None)
+    if name.startswith("relative_humidity"):
+        return np.clip(75.0 + 20.0 * wave(29, "h"), 20.0, 100.0)
+    if name.startswith("pressure") or name == "surface_pressure":
+        return 1013.0 + 12.0 * wave(120, "pr")
+    return 50.0 + 25.0 * wave(24, name)
+
+
+# Naam van de parameter als lijst ("a,b" en herhaalde parameters)
+def _names(query, key):
+    names = []
+    for value in query.get(key, []):
+        names += [name for name in value.split(",") if name]
+    return names
+
+
+class StandinError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+
+# Periode (eerste dag, aantal dagen) uit start_date/end_date of past_days/forecast_days
+def _period(query, historical):
+    if "start_date" in query or "end_date" in query:
+        try:
+            start = date.fromisoformat(query["start_date"][0])
+            end = date.fromisoformat(query["end_date"][0])
+        except (KeyError, ValueError):
+            raise StandinError(400, "Parameter 'start_date' and 'end_date' must be both set in format yyyy-mm-dd")
+    elif historical:
+        raise StandinError(400, "Parameter 'start_date' and 'end_date' are required")
+    else:
+        today = datetime.now(timezone.utc).date()
+        start = today - timedelta(days=int(query.get("past_days", ["0"])[0]))
+        end = today + timedelta(days=int(query.get("forecast_days", [str(DEFAULT_FORECAST_DAYS)])[0]) - 1)
+    days = (end - start).days + 1
+    if days < 1 or days > MAX_DAYS:
+        raise StandinError(400, f"Invalid date range: {start} - {end}")
+    return start, days
+
+
+# Maak het antwoord voor alle gevraagde locaties (dicts zoals openmeteo_encoder.encode_response verwacht)
+def weather_locations(query, historical=False):
+    try:
+        latitudes = [float(value) for value in _names(query, "latitude")]
+        longitudes = [float(value) for value in _names(query, "longitude")]
+    except ValueError:
+        raise StandinError(400, "Latitude and longitude must be numbers")
+    if not latitudes or len(latitudes) != len(longitudes):
+        raise StandinError(400, "Parameter 'latitude' and 'longitude' must have the same number of elements")
+
+    start, days = _period(query, historical)
+    requested_timezone = query.get("timezone", ["GMT"])[0]
+    hourly_names, daily_names = _names(query, "hourly"), _names(query, "daily")
+
+    locations = []
+    for location_id, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        timezone_name = _auto_timezone(lat, lon) if requested_timezone == "auto" else requested_timezone
+        try:
+            zone = zoneinfo.ZoneInfo(timezone_name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise StandinError(400, f"Invalid timezone '{timezone_name}'")
+        # Open-Meteo gebruikt één vaste UTC-offset voor het hele antwoord
+        local_noon = datetime.combine(start, datetime.min.time().replace(hour=12), zone)
+        offset = int(local_noon.utcoffset().total_seconds())
+        first = int(datetime.combine(start, datetime.min.time(), timezone.utc).timestamp()) - offset
+
+        location = {
+            "latitude": round(lat / 0.02) * 0.02, "longitude": round(lon / 0.02) * 0.02, "elevation": 5.0,
+            "utc_offset_seconds": offset, "timezone": timezone_name,
+            "timezone_abbreviation": local_noon.tzname() or "GMT", "location_id": location_id,
+        }
+        if hourly_names:
+            unix = first + np.arange(days * 24, dtype=np.int64) * 3600
+            location["hourly"] = (unix[0], unix[-1] + 3600, 3600, {
+                name: synthetic_values(name, unix.astype(np.float64), lat, lon).astype(np.float32) for name in hourly_names
+            })
+        if daily_names:
+            unix = first + np.arange(days, dtype=np.int64) * 86400
+            day_dates = np.datetime64(start, "D") + np.arange(days)
+            events = sun_events(day_dates, lat, lon, events=("sunrise", "sunset"))
+            values = {}
+            for name in daily_names:
+                if name in events:
+                    values[name] = events[name].astype("datetime64[s]").astype(np.int64)
+                else:
+                    values[name] = synthetic_values(name, unix.astype(np.float64) + 43200, lat, lon).astype(np.float32)
+            location["daily"] = (unix[0], unix[-1] + 86400, 86400, values)
+        locations.append(location)
+    return locations
+
+
+# Zelfde gegevens als JSON (standaardformaat van Open-Meteo: lokale tijd als "YYYY-MM-DDTHH:MM")
+def weather_json(locations):
+    def section(block, offset, with_time_values=()):
+        start, end, interval, values = block
+        times = np.arange(start, end, interval) + offset
+        data = {"time": [datetime.fromtimestamp(int(t), timezone.utc).strftime("%Y-%m-%dT%H:%M") for t in times]}
+        for name, array in values.items():
+            if name in with_time_values:
+                data[name] = [datetime.fromtimestamp(int(t) + offset, timezone.utc).strftime("%Y-%m-%dT%H:%M") for t in array]
+            else:
+                data[name] = [None if np.isnan(v) else round(float(v), 2) for v in array]
+        return data
+
+    results = []
+    for location in locations:
+        result = {key: location[key] for key in ("latitude", "longitude", "elevation", "utc_offset_seconds",
+                                                 "timezone", "timezone_abbreviation")}
+        if "hourly" in location:
+            result["hourly"] = section(location["hourly"], location["utc_offset_seconds"])
+        if "daily" in location:
+            result["daily"] = section(location["daily"], location["utc_offset_seconds"], ("sunrise", "sunset"))
+        results.append(result)
+    return results[0] if len(results) == 1 else results
+
+
+# Nominatim: eerst de offline plaatsnamenlijst, anders vaste (synthetische) coördinaten binnen Europa
+def geocode(query):
+    from gazetteer import load_gazetteer
+
+    name = query.get("q", [""])[0].strip()
+    if not name:
+        return []
+    country_code = (query.get("countrycodes", [""])[0] or "").upper() or None
+    gazetteer = geocode.gazetteer = getattr(geocode, "gazetteer", None) or load_gazetteer()
+    found = gazetteer.resolve(name, country_code) or next(
+        ((lat, lon) for _, _, lat, lon in gazetteer.complete(name, country_code, limit=1)), None
+    )
+    if found:
+        lat, lon = found
+        kind = "gazetteer"
+    else:
+        digest = hashlib.sha1(name.casefold().encode()).digest()
+        lat = 43.0 + int.from_bytes(digest[:4], "little") / 2**32 * 12.0
+        lon = -2.0 + int.from_bytes(digest[4:8], "little") / 2**32 * 20.0
+        kind = "synthetic"
+    return [{"lat": f"{lat:.7f}", "lon": f"{lon:.7f}", "display_name": name, "class": kind,
+             "address": {"country_code": (country_code or "").lower()}}]
+
+
+# sunrise-sunset.org: tijden in UTC (formatted=0), berekend met solar.py
+def sun_times(query):
+    try:
+        lat, lon = float(query["lat"][0]), float(query["lng"][0])
+    except (KeyError, ValueError):
+        return {"results": "", "status": "INVALID_REQUEST"}
+    day = query.get("date", ["today"])[0]
+    day = datetime.now(timezone.utc).date() if day == "today" else date.fromisoformat(day)
+    events = sun_events(np.datetime64(day, "D"), lat, lon)
+    results = {
+        name: None if np.isnat(value) else f"{np.datetime_as_string(value, unit='s')}+00:00"
+        for name, value in events.items()
+    }
+    return {"results": results, "status": "OK"}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "WeatherStandin/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode(), "application/json; charset=utf-8")
+
+    # Opgenomen antwoord voor deze aanvraag (zelfde sleutel als benchmarks/replay.py), of None
+    def _replay(self, prefix, parts):
+        if not self.server.fixtures_dir:
+            return None
+        from benchmarks.replay import fixture_path
+
+        public_url = PREFIXES[prefix] + parts.path[len(prefix):] + (f"?{parts.query}" if parts.query else "")
+        path = fixture_path("GET", public_url, self.server.fixtures_dir)
+        if not os.path.exists(f"{path}.json"):
+            return None
+        with open(f"{path}.json", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        with open(f"{path}.body", "rb") as handle:
+            return meta["status"], handle.read(), meta["headers"].get("Content-Type", "application/octet-stream")
+
+    def do_GET(self):
+        server = self.server
+        # Vertraging en fouten injecteren
+        delay = server.latency_ms + (random.uniform(-server.jitter_ms, server.jitter_ms) if server.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if server.error_rate and random.random() < server.error_rate:
+            self._send_json(server.error_status, {"error": True, "reason": "Injected error"})
+            return
+
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        prefix = next((prefix for prefix in PREFIXES if parts.path.startswith(prefix + "/")), None)
+        if prefix is None:
+            self._send_json(404, {"error": True, "reason": f"Unknown path {parts.path}"})
+            return
+
+        replayed = self._replay(prefix, parts)
+        if replayed:
+            self._send(*replayed)
+            return
+
+        try:
+            if prefix in ("/forecast", "/historical"):
+                locations = weather_locations(query, historical=prefix == "/historical")
+                if query.get("format", [""])[0] == "flatbuffers":
+                    self._send(200, encode_responses(locations), "application/octet-stream")
+                else:
+                    self._send_json(200, weather_json(locations))
+            elif prefix == "/nominatim":
+                self._send_json(200, geocode(query))
+            else:
+                self._send_json(200, sun_times(query))
+        except StandinError as error:
+            self._send_json(error.status, {"error": True, "reason": error.reason})
+
+
+# Start de server (in de achtergrond als background=True) en geef hem terug; server.shutdown() stopt hem
+def serve(host="127.0.0.1", port=8765, fixtures_dir=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+          error_status=503, verbose=False, background=False):
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.fixtures_dir = fixtures_dir
+    server.latency_ms = latency_ms
+    server.jitter_ms = jitter_ms
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.verbose = verbose
+    if background:
+        threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokale stand-in voor Open-Meteo, Nominatim en sunrise-sunset.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", help="speel opgenomen antwoorden af (bv. benchmarks/fixtures), anders synthetisch")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="extra vertraging per aanvraag")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="willekeurige spreiding op de vertraging")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="aandeel aanvragen dat een fout krijgt (0-1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--verbose", action="store_true", help="toon elke aanvraag")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate,
+                   args.error_status, args.verbose)
+    print(f"Stand-in server op http://{args.host}:{args.port} - start de app met WEATHER_APP_STANDIN=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#tile_proxy.py - lokale proxy met schijfcache voor de kaarttegels (OpenStreetMap en de OpenWeatherMap-temperatuurlaag)
+#De browser haalt tegels bij deze proxy in plaats van bij de publieke servers; de OWM-sleutel blijft op de server.
+#Gebruik: python tile_proxy.py [--port 8766] [--seed] [--seed-zooms 3 7]
+#en start de app met WEATHER_APP_TILE_PROXY=http://<host>:8766 (het adres zoals de browser het bereikt)
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import asinh, floor, pi, radians, tan
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from singleflight import singleflight
+
+# Publiek adres van de proxy (leeg = tegels rechtstreeks bij de publieke servers)
+TILE_PROXY_URL = os.getenv("WEATHER_APP_TILE_PROXY", "").rstrip("/")
+TILE_CACHE_DIR = os.getenv("WEATHER_APP_TILES", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tile_cache"))
+OWM_API_KEY = os.getenv("API_KEY_OPENWEATHERMAPS")
+USER_AGENT = "StreamLit-Weather-app/1.0 (ydsdsy@gmail.com)"  # OSM vereist een herkenbare User-Agent
+UPSTREAM_TIMEOUT = 10
+
+# OpenWeatherMap werkt de temperatuurlaag om de paar uur bij; een tegel blijft geldig tot de volgende run
+OWM_UPDATE_HOURS = 3
+
+# Per laag: publieke tegel-URL, geldigheid (vaste duur, of "model" tot de volgende modelrun) en het maximum aantal
+# gelijktijdige aanvragen naar de publieke server (de gebruiksvoorwaarden van OSM vragen weinig parallelle verbindingen)
+LAYERS = {
+    "osm": {
+        "url": "https://tile.openstreetmap.org/{z}/{x}/{y}.png",
+        "ttl": timedelta(days=30),
+        "max_concurrent": 2,
+        "max_zoom": 19,
+    },
+    "owm_temp": {
+        "url": "https://tile.openweathermap.org/map/temp_new/{z}/{x}/{y}.png?appid={key}",
+        "ttl": "model",
+        "max_concurrent": 4,
+        "max_zoom": 18,
+    },
+}
+
+# Europa (zoals in de kaarten van de app) en de zoomniveaus om vooraf te laden
+EUROPE_BOUNDS = (34.0, -25.0, 72.0, 45.0)  # zuid, west, noord, oost
+SEED_ZOOMS = (3, 7)
+
+_limits = {name: threading.BoundedSemaphore(layer["max_concurrent"]) for name, layer in LAYERS.items()}
+_session = None
+_session_lock = threading.Lock()
+
+
+# Eén gewone (niet gecachete) sessie met een verbindingspool; de tegels hebben hun eigen schijfcache
+def get_tile_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=len(LAYERS), pool_maxsize=max(layer["max_concurrent"] for layer in LAYERS.values()))
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+# Tegel-URL voor folium: via de proxy als die ingesteld is, anders rechtstreeks (met sleutel, enkel als terugval);
+# None voor een laag die een sleutel nodig heeft als er geen proxy en geen sleutel is (elke tegel zou 401 geven)
+def tile_url(layer):
+    if TILE_PROXY_URL:
+        return f"{TILE_PROXY_URL}/tiles/{layer}/{{z}}/{{x}}/{{y}}.png"
+    if "{key}" in LAYERS[layer]["url"] and not OWM_API_KEY:
+        return None
+    return LAYERS[layer]["url"].replace("{key}", OWM_API_KEY or "")
+
+
+# Tot wanneer (unix-tijd) een tegel van deze laag geldig is, gerekend vanaf het moment van ophalen
+def _expires_at(layer, fetched):
+    ttl = LAYERS[layer]["ttl"]
+    if ttl != "model":
+        return fetched + ttl.total_seconds()
+    moment = datetime.fromtimestamp(fetched, timezone.utc)
+    run = moment.replace(minute=0, second=0, microsecond=0)
+    run -= timedelta(hours=run.hour % OWM_UPDATE_HOURS)
+    return (run + timedelta(hours=OWM_UPDATE_HOURS)).timestamp()
+
+
+# Pad van een tegel in de schijfcache: <map>/<laag>/<z>/<x>/<y>.png (de wijzigingstijd is het ophaalmoment)
+def tile_path(layer, z, x, y):
+    return os.path.join(TILE_CACHE_DIR, layer, str(z), str(x), f"{y}.png")
+
+
+def _valid_tile(layer, z, x, y):
+    return layer in LAYERS and 0 <= z <= LAYERS[layer]["max_zoom"] and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+# Haal een tegel bij de publieke server (begrensd per laag) en schrijf ze atomair naar de cache
+def _fetch_upstream(layer, z, x, y):
+    url = LAYERS[layer]["url"].format(z=z, x=x, y=y, key=OWM_API_KEY or "")
+    with _limits[layer]:
+        response = get_tile_session().get(url, timeout=UPSTREAM_TIMEOUT)
+    response.raise_for_status()
+    path = tile_path(layer, z, x, y)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(response.content)
+    os.replace(temporary, path)
+    return response.content
+
+
+def get_tile(layer, z, x, y, now=None):
+    """
+    Geef (bytes, verlooptijd als unix-tijd) van een tegel: uit de schijfcache zolang ze geldig is, anders opnieuw
+    opgehaald. Gelijktijdige aanvragen voor dezelfde tegel delen één ophaling; bij een storing van de publieke
+    server wordt een verlopen tegel uit de cache teruggegeven.
+    """
+    now = now or time.time()
+    path = tile_path(layer, z, x, y)
+    try:
+        fetched = os.path.getmtime(path)
+    except OSError:
+        fetched = None
+    if fetched is not None and _expires_at(layer, fetched) > now:
+        with open(path, "rb") as handle:
+            return handle.read(), _expires_at(layer, fetched)
+    try:
+        content = singleflight(("tile", layer, z, x, y), lambda: _fetch_upstream(layer, z, x, y))
+        return content, _expires_at(layer, now)
+    except requests.RequestException:
+        if fetched is None:
+            raise
+        with open(path, "rb") as handle:
+            return handle.read(), now + 60  # verlopen tegel, kort opnieuw proberen
+
+
+# Alle tegels (z, x, y) die een gebied raken op één zoomniveau (Web Mercator)
+def tiles_in_bounds(bounds, z):
+    south, west, north, east = bounds
+
+    def tile_xy(lat, lon):
+        n = 2**z
+        x = int(floor((lon + 180.0) / 360.0 * n))
+        y = int(floor((1.0 - asinh(tan(radians(lat))) / pi) / 2.0 * n))
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+    x_min, y_min = tile_xy(north, west)
+    x_max, y_max = tile_xy(south, east)
+    return [(z, x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+
+# Laad alle tegels van de gevraagde lagen vooraf in de cache (al geldige tegels worden overgeslagen)
+def seed(layers=tuple(LAYERS), bounds=EUROPE_BOUNDS, zooms=SEED_ZOOMS, progress=print):
+    tiles = [(layer, *tile) for layer in layers for z in range(zooms[0], zooms[1] + 1) for tile in tiles_in_bounds(bounds, z)]
+    failures = 0
+    # Meer threads dan de limiet per laag heeft geen zin; de semaforen houden de publieke servers ontzien
+    with ThreadPoolExecutor(max_workers=sum(LAYERS[layer]["max_concurrent"] for layer in layers)) as executor:
+        futures = [executor.submit(get_tile, *tile) for tile in tiles]
+        for done, future in enumerate(futures, 1):
+            try:
+                future.result()
+            except requests.RequestException:
+                failures += 1
+            if done % 100 == 0 or done == len(futures):
+                progress(f"{done}/{len(futures)} tegels ({failures} mislukt)")
+    return len(tiles), failures
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        try:
+            prefix, layer, z, x, y = parts
+            z, x, y = int(z), int(x), int(y.removesuffix(".png"))
+        except ValueError:
+            self.send_error(404)
+            return
+        if prefix != "tiles" or not _valid_tile(layer, z, x, y):
+            self.send_error(404)
+            return
+        try:
+            content, expires = get_tile(layer, z, x, y)
+        except requests.RequestException as error:
+            self.send_error(502, str(error))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(content)))
+        # De browser mag de tegel zelf bewaren zolang ze geldig is
+        self.send_header("Cache-Control", f"public, max-age={max(0, int(expires - time.time()))}")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(content)
+
+
+# Start de proxy (in de achtergrond als background=True) en geef de server terug
+def serve(host="0.0.0.0", port=8766, background=False):
+    server = ThreadingHTTPServer((host, port), TileHandler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, name="tile-proxy", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tegelproxy met schijfcache voor OSM en de OWM-temperatuurlaag.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--seed", action="store_true", help="laad eerst de tegels van Europa in de cache")
+    parser.add_argument("--seed-only", action="store_true", help="enkel vooraf laden, daarna stoppen")
+    parser.add_argument("--seed-zooms", type=int, nargs=2, default=SEED_ZOOMS, metavar=("VAN", "TOT"))
+    parser.add_argument("--layers", nargs="+", choices=tuple(LAYERS), default=tuple(LAYERS))
+    args = parser.parse_args(argv)
+
+    if "owm_temp" in args.layers and not OWM_API_KEY:
+        print("Let op: API_KEY_OPENWEATHERMAPS is niet ingesteld; de temperatuurlaag zal mislukken.")
+    if args.seed or args.seed_only:
+        total, failures = seed(args.layers, zooms=tuple(args.seed_zooms))
+        print(f"{total - failures} van {total} tegels in de cache")
+        if args.seed_only:
+            return 1 if failures else 0
+
+    server = serve(args.host, args.port)
+    print(f"Tegelproxy op http://{args.host}:{args.port} - start de app met WEATHER_APP_TILE_PROXY=<publiek adres>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#timezones.py - gedeelde tijdzonebepaling (één TimezoneFinder per proces, met cache op afgeronde coördinaten)
+from functools import lru_cache
+
+import pytz
+import streamlit as st
+from timezonefinder import TimezoneFinder
+
+COORDINATE_DECIMALS = 2  # ~1 km; fijner heeft geen zin voor tijdzonegrenzen in de praktijk
+LOOKUP_CACHE_SIZE = 4096
+
+# Vertrouw de tijdzone die Open-Meteo zelf teruggeeft (timezone=auto) in plaats van een polygon-opzoeking
+TRUST_API_TIMEZONE = True
+
+
+# Eén TimezoneFinder voor het hele proces; de polygondata wordt pas bij het eerste gebruik geladen
+@st.cache_resource
+def get_timezone_finder():
+    return TimezoneFinder()
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _timezone_at_rounded(lat, lon):
+    return get_timezone_finder().timezone_at(lat=lat, lng=lon)
+
+
+# Tijdzonenaam (bv. "Europe/Brussels") voor een locatie, of None als er geen gevonden wordt
+def timezone_name_at(lat, lon):
+    return _timezone_at_rounded(round(float(lat), COORDINATE_DECIMALS), round(float(lon), COORDINATE_DECIMALS))
+
+
+# pytz-tijdzone voor een locatie; gebruikt de tijdzone uit het API-antwoord als die er is en vertrouwd wordt
+def get_local_timezone(lat, lon, api_timezone=None):
+    if api_timezone and TRUST_API_TIMEZONE and api_timezone not in ("GMT", "UTC"):
+        try:
+            return pytz.timezone(api_timezone)
+        except pytz.UnknownTimeZoneError:
+            pass
+    timezone_str = timezone_name_at(lat, lon)
+    if not timezone_str:
+        return None
+    return pytz.timezone(timezone_str)